@@ -4,14 +4,23 @@ Analyzes movie features including genres, keywords, cast, crew, and plot.
 """
 
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from scipy.sparse import hstack
 import numpy as np
-from tmdb_service import TMDbService
+import joblib
+from tmdb_service import TMDbService, PartialResult, tmdb_cache
 import os
+import copy
+import time
+import hashlib
+import string
 import importlib
-from typing import Optional, Set, List, Dict, Any
+from collections import OrderedDict
+from threading import Lock, Thread
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set, List, Dict, Any, TypedDict
 try:
-    from movielens import load_tags_enrichment, recommend_similar_by_tmdbId, load_similarity_model
+    from movielens import load_tags_enrichment, recommend_similar_by_tmdbId, load_similarity_model, similarity_model_exists
     _ML_AVAILABLE = True
 except Exception as e:
     # Optional dependency: allow app to run without pandas/scikit stack for CF enrichment
@@ -23,7 +32,248 @@ except Exception as e:
         return []
     def load_similarity_model(*args, **kwargs):
         return None
+    def similarity_model_exists(*args, **kwargs):
+        return False
+try:
+    import diskcache
+except ImportError:  # Optional: embeddings are only cached in memory without it
+    diskcache = None
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:  # Optional: fall back to the NumPy MMR implementation
+    _NUMBA_AVAILABLE = False
+try:
+    from chunkdot import cosine_similarity_top_k
+except ImportError:  # Optional: exact dense pairwise similarity is used instead
+    cosine_similarity_top_k = None
+try:
+    import ahocorasick
+except ImportError:  # Optional: fall back to plain substring scans for concept matching
+    ahocorasick = None
 import config
+from config import ENABLE_CONCEPT_EXPANSION
+
+
+# Concept groups: broaden candidate pool when these themes appear in a movie's keywords
+CONCEPTS = {
+    'robots': {'robot', 'robots', 'mecha', 'android', 'cyborg', 'giant robot'},
+    'aliens': {'alien', 'aliens', 'extraterrestrial', 'xenomorph', 'space invasion'},
+    'cars':   {'car', 'cars', 'street racing', 'car race', 'racing', 'drag racing'},
+}
+
+
+def _build_concept_automaton():
+    """Compile all concept synonyms into one Aho-Corasick automaton (None if unavailable)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for concept, synonyms in CONCEPTS.items():
+        for syn in synonyms:
+            if syn in automaton:
+                automaton.get(syn)[0].add(concept)
+            else:
+                automaton.add_word(syn, ({concept}, syn))
+    automaton.make_automaton()
+    return automaton
+
+
+# Per-field TF-IDF block weights (field name, weight). Each field is vectorized
+# by its own vectorizer and the blocks are scaled before stacking.
+FEATURE_FIELD_WEIGHTS = (
+    ('genres', 3.0),
+    ('director', 3.0),
+    ('keywords', 2.0),
+    ('ml_tags', 2.0),
+    ('cast', 2.0),
+    ('overview', 1.0),
+    ('crew', 1.0),
+)
+
+
+def _mmr_select_numpy(rel: np.ndarray, pairwise: np.ndarray, k: int, lam: float) -> np.ndarray:
+    """Greedy MMR selection: returns up to ``k`` row indices in pick order."""
+    n = rel.shape[0]
+    selected = np.empty(min(k, n), dtype=np.int64)
+    selected_mask = np.zeros(n, dtype=bool)
+    # Running max similarity of each candidate to the selected set
+    max_sim = np.zeros(n)
+    for step in range(selected.shape[0]):
+        mmr = lam * rel - (1 - lam) * max_sim
+        mmr[selected_mask] = -np.inf
+        best = int(mmr.argmax())
+        selected[step] = best
+        selected_mask[best] = True
+        max_sim = pairwise[best].copy() if step == 0 else np.maximum(max_sim, pairwise[best])
+    return selected
+
+
+def _mmr_select_loop(rel, pairwise, k, lam):
+    n = rel.shape[0]
+    m = min(k, n)
+    selected = np.empty(m, dtype=np.int64)
+    taken = np.zeros(n, dtype=np.bool_)
+    max_sim = np.zeros(n)
+    for step in range(m):
+        best = -1
+        best_mmr = -np.inf
+        for j in range(n):
+            if taken[j]:
+                continue
+            score = lam * rel[j] - (1 - lam) * max_sim[j]
+            if best < 0 or score > best_mmr:
+                best_mmr = score
+                best = j
+        selected[step] = best
+        taken[best] = True
+        for j in prange(n):
+            s = pairwise[best, j]
+            if step == 0 or s > max_sim[j]:
+                max_sim[j] = s
+    return selected
+
+
+# Native-compiled kernel when Numba is installed (cached to disk after first compile)
+_mmr_select = njit(parallel=True, fastmath=True, cache=True)(_mmr_select_loop) if _NUMBA_AVAILABLE else _mmr_select_numpy
+
+# Above this many candidates, MMR uses a chunked top-k pairwise similarity (chunkdot)
+PAIRWISE_TOP_K_MIN_CANDIDATES = 64
+PAIRWISE_TOP_K = 20
+
+
+def _pairwise_similarity(vecs) -> np.ndarray:
+    """Dense cosine similarity between L2-normalized rows.
+
+    For large candidate sets with chunkdot installed, only each row's top-k
+    neighbours are kept (others read as 0), computed in memory-bounded chunks.
+    """
+    n = vecs.shape[0]
+    if cosine_similarity_top_k is not None and n > PAIRWISE_TOP_K_MIN_CANDIDATES:
+        try:
+            top = cosine_similarity_top_k(vecs, top_k=min(PAIRWISE_TOP_K, n), max_memory=int(2e9))
+            return np.asarray(top.toarray(), dtype=np.float64)
+        except Exception as e:
+            print(f"chunkdot pairwise failed ({e}); using dense similarity.")
+    pairwise = vecs @ vecs.T
+    if hasattr(pairwise, 'toarray'):
+        pairwise = pairwise.toarray()
+    return np.ascontiguousarray(pairwise, dtype=np.float64)
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-RAM LRU in front of an optional diskcache store.
+
+    Keys are SHA1 digests of ``model_name + text`` so swapping models
+    automatically invalidates stale vectors.
+    """
+
+    def __init__(self, directory: Optional[str] = None, maxsize: int = 4096):
+        self._mem = OrderedDict()
+        self._lock = Lock()
+        self._maxsize = maxsize
+        self._disk = None
+        if diskcache is not None and directory:
+            try:
+                self._disk = diskcache.Cache(directory)
+            except Exception as e:
+                print(f"Embedding disk cache unavailable: {e}")
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha1((model_name + text).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._mem.get(key)
+            if vec is not None:
+                self._mem.move_to_end(key)
+                return vec
+        if self._disk is not None:
+            try:
+                vec = self._disk.get(key)
+            except Exception:
+                vec = None
+            if vec is not None:
+                self._remember(key, vec)
+                return vec
+        return None
+
+    def set(self, key: str, vec: np.ndarray):
+        self._remember(key, vec)
+        if self._disk is not None:
+            try:
+                self._disk.set(key, vec)
+            except Exception as e:
+                print(f"Embedding cache write failed: {e}")
+
+    def _remember(self, key: str, vec: np.ndarray):
+        with self._lock:
+            self._mem[key] = vec
+            self._mem.move_to_end(key)
+            while len(self._mem) > self._maxsize:
+                self._mem.popitem(last=False)
+
+
+class SemanticResultCache:
+    """Cache of `recommend()` payloads keyed by query.
+
+    L0 is an exact match on the normalized query; when a query embedding is
+    available, a miss falls back to the most similar cached query (cosine >=
+    ``threshold``) for the same page. Entries expire after ``ttl`` seconds and
+    the oldest are evicted beyond ``maxsize``.
+    """
+
+    def __init__(self, threshold: float = 0.93, ttl: int = 3600, maxsize: int = 10000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # (query, page) -> (expires, embedding or None, payload)
+        self._lock = Lock()
+        self._matrix = None  # stacked embeddings, rebuilt lazily after inserts/evictions
+        self._matrix_keys = []
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return ' '.join((query or '').lower().split())
+
+    def get(self, query: str, page: int, embedding: Optional[np.ndarray] = None):
+        key = (self.normalize_query(query), page)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and embedding is not None:
+                key = self._nearest(embedding, page)
+                entry = self._entries.get(key) if key else None
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                self._matrix = None
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[2])
+
+    def set(self, query: str, page: int, embedding: Optional[np.ndarray], payload: dict):
+        key = (self.normalize_query(query), page)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, embedding, copy.deepcopy(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def _nearest(self, embedding: np.ndarray, page: int):
+        if self._matrix is None:
+            self._matrix_keys = [k for k, e in self._entries.items() if e[1] is not None]
+            self._matrix = np.vstack([self._entries[k][1] for k in self._matrix_keys]) if self._matrix_keys else None
+        if self._matrix is None:
+            return None
+        sims = self._matrix @ embedding
+        # Only consider entries for the same page
+        pages = np.fromiter((k[1] == page for k in self._matrix_keys), dtype=bool, count=len(self._matrix_keys))
+        sims = np.where(pages, sims, -np.inf)
+        best = int(sims.argmax())
+        return self._matrix_keys[best] if sims[best] >= self.threshold else None
 
 
 class MovieRecommendationEngine:
@@ -33,24 +283,38 @@ class MovieRecommendationEngine:
     """
     
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            stop_words='english',
-            ngram_range=(1, 2)
-        )
+        # One TF-IDF vectorizer per profile field; None when a field had no vocabulary
+        self.field_vectorizers: Dict[str, Optional[TfidfVectorizer]] = {}
+        # TF-IDF vocabulary/IDF is fit once (warm corpus) and reused via transform()
+        self._vocab_fit = False
+        self._vocab_lock = Lock()
+        self._load_vectorizer()
         # Optional: external embeddings model (sentence-transformers)
         self._hf_enabled = getattr(config, 'ENABLE_HF_MODEL', False)
         self._hf_model_name = getattr(config, 'HF_MODEL_NAME', 'sentence-transformers/all-MiniLM-L6-v2')
         self._embedder = None
         self._hf_loaded = False
+        self._hf_lock = Lock()
+        self._emb_cache = EmbeddingCache(getattr(config, 'EMBED_CACHE_DIR', None)) if self._hf_enabled else None
+        # Per-movie embeddings keyed by (movie_id, is_query); skips feature building + hashing on repeats
+        self._movie_emb_cache = OrderedDict()
+        self._movie_emb_cache_size = 1024
+        self._movie_emb_cache_lock = Lock()
         # Optional Cross-Encoder reranker
         self._reranker_enabled = getattr(config, 'ENABLE_RERANKER', False)
         self._reranker_model_name = getattr(config, 'RERANKER_MODEL_NAME', 'cross-encoder/ms-marco-MiniLM-L6-v2')
         self._reranker = None
         self._reranker_loaded = False
+        self._reranker_lock = Lock()
+        self._concept_ac = _build_concept_automaton()
+        # Bounded in-process LRU of built movie profiles (keyed by TMDb id)
+        self._profile_cache = OrderedDict()
+        self._profile_cache_lock = Lock()
+        self._profile_cache_size = 4096
         # Lazy-loaded Collaborative Filtering (MovieLens) model
         self.cf_model = None
         self.cf_loaded = False
+        self._cf_lock = Lock()
         # Optional MovieLens tags enrichment
         self.ml_tags_map = {}
         ml_path = config.MOVIELENS_PATH
@@ -61,6 +325,98 @@ class MovieRecommendationEngine:
                     print(f"Loaded MovieLens tag enrichment for {len(self.ml_tags_map):,} movies.")
             except Exception as e:
                 print(f"Failed to load MovieLens tags enrichment: {e}")
+        # Overlap model loading / vocabulary fitting with app startup
+        if getattr(config, 'ENABLE_WARMUP', False):
+            Thread(target=self.warm_up, name='recommender-warmup', daemon=True).start()
+
+    @staticmethod
+    def _make_vectorizer() -> TfidfVectorizer:
+        # float32 halves memory traffic in the sparse dot products; sublinear TF
+        # dampens terms repeated many times within a single field
+        return TfidfVectorizer(
+            max_features=5000,
+            stop_words='english',
+            ngram_range=(1, 2),
+            dtype=np.float32,
+            sublinear_tf=True,
+            norm='l2'
+        )
+
+    def _load_vectorizer(self):
+        """Load previously fitted per-field TF-IDF vectorizers from disk if present."""
+        path = getattr(config, 'TFIDF_MODEL_PATH', None)
+        if not path or not os.path.exists(path):
+            return
+        try:
+            vectorizers = joblib.load(path)
+            if not isinstance(vectorizers, dict):
+                print("Ignoring TF-IDF vectorizer in old single-vectorizer format; will refit on first query.")
+                return
+            expected = self._make_vectorizer().get_params()
+            if any(v is not None and v.get_params() != expected for v in vectorizers.values()):
+                print("Ignoring TF-IDF vectorizer fitted with different settings; will refit on first query.")
+                return
+            self.field_vectorizers = vectorizers
+            self._vocab_fit = True
+            print(f"Loaded TF-IDF vectorizer: {path}")
+        except Exception as e:
+            print(f"Failed to load TF-IDF vectorizer ({e}); will refit on first query.")
+
+    def _ensure_vocabulary(self, profiles: List[dict]):
+        """Fit the per-field TF-IDF vocabularies once over a warm corpus and persist them.
+
+        The corpus is the current query's profiles plus every cached profile
+        and the top-200 popular movies (TFIDF_WARMUP_PAGES), so later queries
+        only need ``transform()``. Terms outside this vocabulary score zero,
+        which is why the persisted file should be refit periodically (see
+        config.TFIDF_MODEL_PATH).
+        """
+        if self._vocab_fit:
+            return
+        with self._vocab_lock:
+            if self._vocab_fit:
+                return
+            warm_ids = []
+            for page in range(1, max(0, int(getattr(config, 'TFIDF_WARMUP_PAGES', 10))) + 1):
+                warm_ids.extend(m.get('id') for m in (TMDbService.get_popular_movies(page=page) or []))
+            warm_ids = [mid for mid in dict.fromkeys(warm_ids) if mid]
+            if warm_ids:
+                with ThreadPoolExecutor(max_workers=min(16, len(warm_ids))) as ex:
+                    list(ex.map(self.build_movie_profile, warm_ids))
+            with self._profile_cache_lock:
+                cached = list(self._profile_cache.values())
+            corpus = [self.create_feature_fields(p) for p in list(profiles) + cached]
+            vectorizers = {}
+            for field, _ in FEATURE_FIELD_WEIGHTS:
+                docs = [fields[field] for fields in corpus if fields[field]]
+                vec = self._make_vectorizer()
+                try:
+                    vec.fit(docs)
+                except ValueError:
+                    # Empty vocabulary (e.g. no MovieLens tags loaded): skip this block
+                    vec = None
+                vectorizers[field] = vec
+            self.field_vectorizers = vectorizers
+            self._vocab_fit = True
+            path = getattr(config, 'TFIDF_MODEL_PATH', None)
+            if path:
+                try:
+                    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                    joblib.dump(self.field_vectorizers, path)
+                except Exception as e:
+                    print(f"Failed to persist TF-IDF vectorizer: {e}")
+
+    def _match_concepts(self, kw_names: Set[str]) -> Set[str]:
+        """Return the CONCEPTS whose synonyms occur as substrings of any keyword name."""
+        if self._concept_ac is not None:
+            # Newline never appears in a synonym, so matches cannot span two names
+            text = '\n'.join(kw_names)
+            return {concept for _, (concepts, _) in self._concept_ac.iter(text) for concept in concepts}
+        matched = set()
+        for concept, synonyms in CONCEPTS.items():
+            if any(any(syn in name for syn in synonyms) for name in kw_names):
+                matched.add(concept)
+        return matched
 
     def _ensure_hf_model(self):
         """Lazily load the Hugging Face sentence-transformers model if enabled.
@@ -68,47 +424,113 @@ class MovieRecommendationEngine:
         """
         if not self._hf_enabled or self._hf_loaded:
             return
-        self._hf_loaded = True
-        try:
-            st_module = importlib.import_module('sentence_transformers')
-            SentenceTransformer = getattr(st_module, 'SentenceTransformer')
-            # Use a lightweight, widely available model by default
-            self._embedder = SentenceTransformer(self._hf_model_name)
-            print(f"Loaded embeddings model: {self._hf_model_name}")
-        except Exception as e:
-            # Do not hard fail – fallback to TF-IDF
-            print(f"Embeddings model unavailable ({e}); falling back to TF-IDF.")
-            self._embedder = None
+        # Concurrent callers wait for an in-flight (e.g. warm-up) load to finish
+        with self._hf_lock:
+            if self._hf_loaded:
+                return
+            try:
+                st_module = importlib.import_module('sentence_transformers')
+                SentenceTransformer = getattr(st_module, 'SentenceTransformer')
+                # Use a lightweight, widely available model by default
+                self._embedder = SentenceTransformer(self._hf_model_name)
+                # Half precision on CUDA: halves memory traffic, uses tensor cores
+                try:
+                    torch = importlib.import_module('torch')
+                    if torch.cuda.is_available():
+                        self._embedder = self._embedder.half().to('cuda')
+                except Exception:
+                    pass
+                print(f"Loaded embeddings model: {self._hf_model_name}")
+            except Exception as e:
+                # Do not hard fail – fallback to TF-IDF
+                print(f"Embeddings model unavailable ({e}); falling back to TF-IDF.")
+                self._embedder = None
+            self._hf_loaded = True
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalized embeddings.
+
+        Previously seen texts are served from the embedding cache. Misses are
+        length-sorted before batching to minimize padding, then written back.
+        """
+        keys = [EmbeddingCache.key(self._hf_model_name, t) for t in texts]
+        vecs = [self._emb_cache.get(k) for k in keys] if self._emb_cache is not None else [None] * len(texts)
+        misses = [i for i, v in enumerate(vecs) if v is None]
+        if misses:
+            order = sorted(misses, key=lambda i: len(texts[i]))
+            emb = self._embedder.encode(
+                [texts[i] for i in order],
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+            for i, vec in zip(order, emb):
+                vecs[i] = vec
+                if self._emb_cache is not None:
+                    self._emb_cache.set(keys[i], vec)
+        return np.vstack(vecs)
 
     def _ensure_reranker(self):
         """Lazily load a cross-encoder reranker if enabled; fallback silently."""
         if not self._reranker_enabled or self._reranker_loaded:
             return
-        self._reranker_loaded = True
+        with self._reranker_lock:
+            if self._reranker_loaded:
+                return
+            try:
+                st_module = importlib.import_module('sentence_transformers')
+                CrossEncoder = getattr(st_module, 'CrossEncoder')
+                self._reranker = CrossEncoder(self._reranker_model_name)
+                # Half precision on CUDA for faster batched inference
+                try:
+                    torch = importlib.import_module('torch')
+                    if torch.cuda.is_available():
+                        self._reranker.model.half()
+                except Exception:
+                    pass
+                print(f"Loaded reranker model: {self._reranker_model_name}")
+            except Exception as e:
+                print(f"Reranker unavailable ({e}); continuing without reranking.")
+                self._reranker = None
+            self._reranker_loaded = True
+
+    def warm_up(self):
+        """Load optional models and the CF model, and fit the TF-IDF vocabulary ahead of the first query.
+
+        A tiny dummy encode/predict forces lazy kernel initialization as well.
+        """
         try:
-            st_module = importlib.import_module('sentence_transformers')
-            CrossEncoder = getattr(st_module, 'CrossEncoder')
-            self._reranker = CrossEncoder(self._reranker_model_name)
-            print(f"Loaded reranker model: {self._reranker_model_name}")
+            self._ensure_hf_model()
+            if self._embedder is not None:
+                self._embedder.encode(['warmup'], convert_to_numpy=True, show_progress_bar=False)
+            self._ensure_reranker()
+            if self._reranker is not None:
+                self._reranker.predict([('warmup', 'warmup')], show_progress_bar=False)
+            self._try_load_cf()
+            self._ensure_vocabulary([])
         except Exception as e:
-            print(f"Reranker unavailable ({e}); continuing without reranking.")
-            self._reranker = None
+            print(f"Recommendation engine warm-up failed: {e}")
 
     def _try_load_cf(self):
-        """Attempt to load the CF model once; safe no-op if unavailable."""
+        """Attempt to load the CF model once; safe no-op if unavailable.
+
+        Concurrent callers wait for the in-flight load instead of seeing no model.
+        """
         if self.cf_loaded:
             return
-        self.cf_loaded = True  # attempt only once per process
-        if not _ML_AVAILABLE:
-            self.cf_model = None
-            return
-        try:
-            if os.path.exists(config.CF_MODEL_PATH):
-                self.cf_model = load_similarity_model(config.CF_MODEL_PATH)
-                print("Loaded MovieLens CF model for hybrid recommendations.")
-        except Exception as e:
-            print(f"Failed to load CF model: {e}")
-            self.cf_model = None
+        with self._cf_lock:
+            if self.cf_loaded:
+                return
+            if _ML_AVAILABLE:
+                try:
+                    if similarity_model_exists(config.CF_MODEL_PATH):
+                        self.cf_model = load_similarity_model(config.CF_MODEL_PATH)
+                        print("Loaded MovieLens CF model for hybrid recommendations.")
+                except Exception as e:
+                    print(f"Failed to load CF model: {e}")
+                    self.cf_model = None
+            self.cf_loaded = True  # attempt only once per process
 
     def _cf_neighbors_for_tmdb(self, tmdb_id: int, top_n: int = 25) -> Set[int]:
         """Return a set of TMDb IDs that are CF-neighbors of the given TMDb ID."""
@@ -123,16 +545,35 @@ class MovieRecommendationEngine:
         Build a comprehensive feature profile for a movie by fetching
         and combining multiple attributes from TMDb.
         
+        Results are memoized in a bounded LRU; failed lookups are not cached.
         Returns a dictionary with all movie features.
         """
-        # Get basic movie details
-        details = TMDbService.get_movie_details(movie_id)
+        try:
+            key = int(movie_id)
+        except (TypeError, ValueError):
+            return None
+        with self._profile_cache_lock:
+            profile = self._profile_cache.get(key)
+            if profile is not None:
+                self._profile_cache.move_to_end(key)
+                return profile
+        profile = self._fetch_movie_profile(key)
+        if profile:
+            with self._profile_cache_lock:
+                self._profile_cache[key] = profile
+                self._profile_cache.move_to_end(key)
+                while len(self._profile_cache) > self._profile_cache_size:
+                    self._profile_cache.popitem(last=False)
+        return profile
+
+    def _fetch_movie_profile(self, movie_id):
+        """Fetch details/credits/keywords from TMDb and assemble a profile dict."""
+        # Details, credits and keywords in a single append_to_response request
+        details = TMDbService.get_movie_full(movie_id)
         if not details:
             return None
-        
-        # Get additional data
-        credits = TMDbService.get_movie_credits(movie_id)
-        keywords = TMDbService.get_movie_keywords(movie_id)
+        credits = details.get('credits')
+        keywords = (details.get('keywords') or {}).get('keywords', [])
         
         # Extract genres
         genres = [g['name'] for g in details.get('genres', [])]
@@ -154,6 +595,7 @@ class MovieRecommendationEngine:
         
         # Extract keywords
         keyword_list = [kw['name'] for kw in keywords]
+        keyword_ids = [kw['id'] for kw in keywords if kw.get('id')]
 
         # Optional: add MovieLens tags if available
         ml_tags = self.ml_tags_map.get(movie_id, [])
@@ -168,6 +610,7 @@ class MovieRecommendationEngine:
             'director': director,
             'crew': crew_members[:3],  # Top 3 crew members
             'keywords': keyword_list,
+            'keyword_ids': keyword_ids,
             'ml_tags': ml_tags,
             'release_year': details.get('release_date', '')[:4] if details.get('release_date') else '',
             'vote_average': details.get('vote_average', 0),
@@ -176,9 +619,33 @@ class MovieRecommendationEngine:
         
         return profile
     
+    def create_feature_fields(self, profile) -> Dict[str, str]:
+        """
+        Split a movie profile into one text per TF-IDF field.
+        Field importance is applied later as a block weight (FEATURE_FIELD_WEIGHTS),
+        so each field is tokenized only once.
+        """
+        profile = profile or {}
+        fields = {}
+        for field, _ in FEATURE_FIELD_WEIGHTS:
+            value = profile.get(field) or ''
+            fields[field] = value if isinstance(value, str) else ' '.join(value)
+        return fields
+
+    def _tfidf_matrix(self, profiles: List[dict]):
+        """Vectorize profiles into a weighted, L2-normalized CSR matrix (one row per profile)."""
+        field_rows = [self.create_feature_fields(p) for p in profiles]
+        blocks = []
+        for field, weight in FEATURE_FIELD_WEIGHTS:
+            vec = self.field_vectorizers.get(field)
+            if vec is None:
+                continue
+            blocks.append(weight * vec.transform([fields[field] for fields in field_rows]))
+        return normalize(hstack(blocks, format='csr'), norm='l2', copy=False)
+
     def create_feature_string(self, profile):
         """
-        Convert movie profile into a weighted feature string for vectorization.
+        Convert movie profile into a weighted feature string for the embeddings model.
         Features are repeated based on importance for better similarity matching.
         """
         if not profile:
@@ -222,6 +689,60 @@ class MovieRecommendationEngine:
         
         return ' '.join(features)
     
+    def embed_query(self, text: str) -> Optional[np.ndarray]:
+        """Normalized embedding of a free-text query, or None when embeddings are disabled."""
+        if not self._hf_enabled:
+            return None
+        self._ensure_hf_model()
+        if self._embedder is None:
+            return None
+        try:
+            return self._encode([SemanticResultCache.normalize_query(text)])[0]
+        except Exception as e:
+            print(f"Query embedding failed: {e}")
+            return None
+
+    def _hf_text(self, profile, is_query: bool) -> str:
+        """Feature string for the embeddings model, with any model-specific prefix."""
+        text = self.create_feature_string(profile)
+        # Some models expect instructions/prefixes for best performance
+        name_l = (self._hf_model_name or '').lower()
+        if 'e5' in name_l:
+            return ('query: ' if is_query else 'passage: ') + text
+        if 'bge' in name_l and is_query:
+            return "Represent this sentence for searching relevant passages: " + text
+        return text
+
+    def _score_hf(self, source_profile, candidate_profiles):
+        """Embedding similarity of each candidate to the source; returns (similarities, cand_vecs)."""
+        profiles = [source_profile] + candidate_profiles
+        keys = [(source_profile['id'], True)] + [(p['id'], False) for p in candidate_profiles]
+        with self._movie_emb_cache_lock:
+            vecs = [self._movie_emb_cache.get(k) for k in keys]
+        misses = [i for i, v in enumerate(vecs) if v is None]
+        if misses:
+            encoded = self._encode([self._hf_text(profiles[i], keys[i][1]) for i in misses])
+            with self._movie_emb_cache_lock:
+                for i, vec in zip(misses, encoded):
+                    vecs[i] = vec
+                    self._movie_emb_cache[keys[i]] = vec
+                    self._movie_emb_cache.move_to_end(keys[i])
+                while len(self._movie_emb_cache) > self._movie_emb_cache_size:
+                    self._movie_emb_cache.popitem(last=False)
+        # Normalized embeddings: dot product is the cosine similarity
+        embeddings = np.vstack(vecs)
+        cand_vecs = embeddings[1:]
+        return cand_vecs @ embeddings[0], cand_vecs
+
+    def _score_tfidf(self, source_profile, candidate_profiles):
+        """TF-IDF similarity of each candidate to the source; returns (similarities, cand_vecs)."""
+        all_profiles = [source_profile] + candidate_profiles
+        self._ensure_vocabulary(all_profiles)
+        tfidf_matrix = self._tfidf_matrix(all_profiles)
+        cand_vecs = tfidf_matrix[1:]
+        # Rows are unit-length, so a sparse dot product is the cosine similarity
+        return (tfidf_matrix[0] @ cand_vecs.T).toarray().ravel(), cand_vecs
+
     def get_intelligent_recommendations(self, source_movie_id, num_recommendations=12):
         """
         Get intelligent movie recommendations based on content similarity.
@@ -264,23 +785,13 @@ class MovieRecommendationEngine:
         candidate_ids.discard(source_movie_id)
         
         # Keyword-based expansion for thematic concepts (robots, aliens, cars, etc.)
-        from config import ENABLE_CONCEPT_EXPANSION
         if ENABLE_CONCEPT_EXPANSION:
             try:
-                kw_list = TMDbService.get_movie_keywords(source_movie_id) or []  # [{'id','name'},...]
-                kw_names = { (kw.get('name') or '').lower() for kw in kw_list }
-                kw_ids = [ kw.get('id') for kw in kw_list if isinstance(kw, dict) and kw.get('id') ]
-
-                # Concept groups: broaden candidate pool when these themes appear
-                CONCEPTS = {
-                    'robots': {'robot', 'robots', 'mecha', 'android', 'cyborg', 'giant robot'},
-                    'aliens': {'alien', 'aliens', 'extraterrestrial', 'xenomorph', 'space invasion'},
-                    'cars':   {'car', 'cars', 'street racing', 'car race', 'racing', 'drag racing'},
-                }
-                matched = set()
-                for concept, synonyms in CONCEPTS.items():
-                    if any(any(syn in name for syn in synonyms) for name in kw_names):
-                        matched.add(concept)
+                # Reuse the source profile's keywords instead of re-fetching them
+                kw_names = { (name or '').lower() for name in source_profile.get('keywords', []) }
+                kw_ids = source_profile.get('keyword_ids', [])
+
+                matched = self._match_concepts(kw_names)
 
                 # Use the movie's own keyword IDs as a strong signal
                 if kw_ids:
@@ -299,94 +810,60 @@ class MovieRecommendationEngine:
             except Exception as e:
                 print(f"Keyword expansion failed: {e}")
 
-        # Build profiles for all candidates
+        # Build profiles for all candidates; each profile is network-bound, so overlap them
+        candidate_ids.discard(None)
         candidate_profiles = []
-        for movie_id in candidate_ids:
-            profile = self.build_movie_profile(movie_id)
-            if profile:
-                candidate_profiles.append(profile)
+        if candidate_ids:
+            with ThreadPoolExecutor(max_workers=min(16, len(candidate_ids))) as ex:
+                candidate_profiles = [p for p in ex.map(self.build_movie_profile, candidate_ids) if p]
         
         if not candidate_profiles:
             return []
         
-        # Create feature strings
-        source_features = self.create_feature_string(source_profile)
-        candidate_features = [self.create_feature_string(p) for p in candidate_profiles]
-        
-        # Calculate similarity using HF embeddings if available, otherwise TF-IDF
-        all_features = [source_features] + candidate_features
-        try:
-            # Try HF embeddings path first (if enabled)
+        # Calculate similarity using HF embeddings if available, otherwise TF-IDF.
+        # The HF branch (feature strings, prefixes) is skipped entirely when disabled.
+        if self._hf_enabled:
             self._ensure_hf_model()
-            use_hf = self._embedder is not None
+        use_hf = self._embedder is not None
+        try:
             if use_hf:
-                import numpy as _np
-                # Some models expect instructions/prefixes for best performance
-                name_l = (self._hf_model_name or '').lower()
-                if 'e5' in name_l:
-                    prefixed = ['query: ' + source_features] + ['passage: ' + cf for cf in candidate_features]
-                elif 'bge' in name_l:
-                    instruction = "Represent this sentence for searching relevant passages: "
-                    prefixed = [instruction + source_features] + candidate_features
-                else:
-                    prefixed = all_features
-                # Normalize to use dot product as cosine similarity
-                embeddings = self._embedder.encode(prefixed, convert_to_numpy=True, normalize_embeddings=True)
-                query_vec = embeddings[0:1]
-                cand_vecs = embeddings[1:]
-                # Cosine similarity since normalized
-                similarities = (cand_vecs @ query_vec.T).flatten()
+                similarities, cand_vecs = self._score_hf(source_profile, candidate_profiles)
             else:
-                tfidf_matrix = self.vectorizer.fit_transform(all_features)
-                cand_vecs = tfidf_matrix[1:]
-                # Calculate cosine similarity
-                similarities = cosine_similarity(tfidf_matrix[0:1], cand_vecs).flatten()
-            
+                similarities, cand_vecs = self._score_tfidf(source_profile, candidate_profiles)
+
             # CF neighbors (for hybrid boost)
             cf_neighbors = self._cf_neighbors_for_tmdb(source_movie_id, top_n=50)
 
-            # Combine profiles with similarity scores
-            scored_movies = []
-            for i, profile in enumerate(candidate_profiles):
-                score = similarities[i]
-                
-                # Filter out very low similarity scores (below 3%)
-                if score < 0.03:
-                    continue
-                
-                # Quality boosting:
-                # 1. Boost for higher ratings (up to +0.08 for 8+ rating)
-                rating = profile['vote_average']
-                rating_boost = (rating / 10) * 0.08 if rating >= 6 else 0
-                
-                # 2. Small boost for popularity (helps surface well-known movies)
-                popularity = profile.get('popularity', 0)
-                popularity_boost = min(popularity / 1000, 0.02)  # Max +0.02
-                
-                # 3. Penalty for very old movies (unless it's a classic with high rating)
-                release_year = int(profile.get('release_year', '0') or '0')
-                age_penalty = 0
-                if release_year > 0 and release_year < 1990 and rating < 7.5:
-                    age_penalty = -0.05
-                
-                # 4. Hybrid CF boost if candidate is a CF neighbor of the source
-                cf_boost = 0.0
-                if cf_neighbors and profile['id'] in cf_neighbors:
-                    cf_boost = 0.05  # modest boost to reinforce consensus
-
-                final_score = score + rating_boost + popularity_boost + age_penalty + cf_boost
-                
-                scored_movies.append({
-                    'profile': profile,
-                    'similarity_score': score,
-                    'final_score': final_score
-                })
-            
-            # Filter: Keep only movies with meaningful similarity
-            scored_movies = [m for m in scored_movies if m['similarity_score'] >= 0.03]
-            
-            # Sort by final score (base ranking)
-            scored_movies.sort(key=lambda x: x['final_score'], reverse=True)
+            # Score all candidates at once (struct-of-arrays, one pass over profiles)
+            n = len(candidate_profiles)
+            sim = np.asarray(similarities, dtype=np.float32)
+            rating = np.fromiter((p.get('vote_average') or 0 for p in candidate_profiles), dtype=np.float32, count=n)
+            popularity = np.fromiter((p.get('popularity') or 0 for p in candidate_profiles), dtype=np.float32, count=n)
+            year = np.fromiter((int(p.get('release_year') or 0) for p in candidate_profiles), dtype=np.int32, count=n)
+            cand_ids = np.fromiter((p['id'] for p in candidate_profiles), dtype=np.int64, count=n)
+            cf_arr = np.fromiter(cf_neighbors, dtype=np.int64, count=len(cf_neighbors))
+            cf_mask = np.isin(cand_ids, cf_arr, assume_unique=True)
+
+            # Quality boosting:
+            # 1. Boost for higher ratings (up to +0.08 for 8+ rating)
+            rating_boost = np.where(rating >= 6, rating * 0.008, 0.0)
+            # 2. Small boost for popularity (helps surface well-known movies), max +0.02
+            popularity_boost = np.minimum(popularity / 1000, 0.02)
+            # 3. Penalty for very old movies (unless it's a classic with high rating)
+            age_penalty = np.where((year > 0) & (year < 1990) & (rating < 7.5), -0.05, 0.0)
+            # 4. Hybrid CF boost if candidate is a CF neighbor of the source (modest, reinforces consensus)
+            cf_boost = cf_mask * 0.05
+            final = sim + rating_boost + popularity_boost + age_penalty + cf_boost
+
+            # Keep only movies with meaningful similarity (>= 3%), ranked by final score
+            keep = np.flatnonzero(sim >= 0.03)
+            ranked = keep[np.argsort(-final[keep], kind='stable')]
+            scored_movies = [{
+                'index': int(i),
+                'profile': candidate_profiles[i],
+                'similarity_score': float(sim[i]),
+                'final_score': float(final[i]),
+            } for i in ranked]
 
             # Optional: Rerank top-K using a Cross-Encoder
             self._ensure_reranker()
@@ -394,19 +871,26 @@ class MovieRecommendationEngine:
                 try:
                     top_k = max(1, int(getattr(config, 'RERANKER_TOP_K', 40)))
                     subset = scored_movies[:top_k]
-                    # Build (query, doc) pairs
+                    # Build (query, doc) pairs; truncate each field before joining
                     def join_text(p):
-                        parts = [p.get('title','')]
-                        if p.get('overview'): parts.append(p.get('overview'))
-                        if p.get('genres'): parts.append(' '.join(p.get('genres')))
-                        if p.get('keywords'): parts.append(' '.join(p.get('keywords')))
-                        return ' '.join(parts)[:5120]
+                        parts = [(p.get('title') or '')[:80]]
+                        if p.get('overview'): parts.append(p.get('overview')[:500])
+                        if p.get('genres'): parts.append(' '.join(p.get('genres'))[:200])
+                        if p.get('keywords'): parts.append(' '.join(p.get('keywords'))[:500])
+                        return ' '.join(parts)
                     query_text = join_text(source_profile)
-                    pairs = [(query_text, join_text(item['profile'])) for item in subset]
-                    scores = self._reranker.predict(pairs)
+                    docs = [join_text(item['profile']) for item in subset]
+                    # Length-sorted batches minimize padding; scores are mapped back by position
+                    order = sorted(range(len(docs)), key=lambda i: len(docs[i]))
+                    scores = self._reranker.predict(
+                        [(query_text, docs[i]) for i in order],
+                        batch_size=32,
+                        convert_to_numpy=True,
+                        show_progress_bar=False,
+                    )
                     # Attach reranker scores and sort subset
-                    for item, s in zip(subset, scores):
-                        item['rerank_score'] = float(s)
+                    for i, s in zip(order, scores):
+                        subset[i]['rerank_score'] = float(s)
                     subset.sort(key=lambda x: x.get('rerank_score', 0), reverse=True)
                     # Merge reranked subset back with the rest
                     scored_movies = subset + scored_movies[top_k:]
@@ -415,41 +899,12 @@ class MovieRecommendationEngine:
 
             # Diversify with simple MMR to avoid near-duplicates
             try:
-                from sklearn.metrics.pairwise import cosine_similarity as _cs
-                if use_hf:
-                    # cand_vecs is a numpy array (normalized), use dot product for pairwise
-                    pairwise = cand_vecs @ cand_vecs.T
-                else:
-                    pairwise = _cs(cand_vecs, cand_vecs)
-                # Map profile id to index in candidate_profiles
-                id_to_idx = {p['id']: idx for idx, p in enumerate(candidate_profiles)}
-                lambda_rel = 0.7
-                selected = []  # list of indices into scored_movies
-                # Work off scored_movies order but compute MMR each step
-                available = list(range(len(scored_movies)))
-                while available and len(selected) < num_recommendations:
-                    best_i = None
-                    best_mmr = -1e9
-                    for si in available:
-                        prof = scored_movies[si]['profile']
-                        idx = id_to_idx.get(prof['id'])
-                        if idx is None:
-                            rel = scored_movies[si]['final_score']
-                            div = 0
-                        else:
-                            rel = scored_movies[si]['final_score']
-                            if not selected:
-                                div = 0
-                            else:
-                                # max similarity to any already selected
-                                sel_indices = [id_to_idx.get(scored_movies[j]['profile']['id']) for j in selected if id_to_idx.get(scored_movies[j]['profile']['id']) is not None]
-                                div = max((pairwise[idx, s] for s in sel_indices), default=0)
-                        mmr = lambda_rel * rel - (1 - lambda_rel) * div
-                        if mmr > best_mmr:
-                            best_mmr = mmr
-                            best_i = si
-                    selected.append(best_i)
-                    available.remove(best_i)
+                # cand_vecs rows are L2-normalized in both paths, so dot product == cosine.
+                # Only scored candidates take part, in scored order.
+                order = np.fromiter((m['index'] for m in scored_movies), dtype=np.int64, count=len(scored_movies))
+                pairwise = _pairwise_similarity(cand_vecs[order])
+                rel = np.fromiter((m['final_score'] for m in scored_movies), dtype=np.float64, count=len(scored_movies))
+                selected = _mmr_select(rel, pairwise, num_recommendations, 0.7)
                 final_list = [scored_movies[i] for i in selected]
             except Exception:
                 # Fallback to top-N if MMR fails
@@ -488,14 +943,16 @@ class MovieRecommendationEngine:
                 return recs
             return []
     
-    def get_hybrid_recommendations(self, query, page=1):
+    def get_hybrid_recommendations(self, query, page=1, search_results=None):
         """
         Hybrid approach: Search for movies, then use AI to recommend similar ones.
         
         For each search result, get intelligent recommendations and aggregate them.
+        Callers that already ran the search can pass its results to skip the lookup.
         """
         # Search for movies matching query
-        search_results = TMDbService.search_movies(query, page)
+        if search_results is None:
+            search_results = TMDbService.search_movies(query, page)
         
         if not search_results:
             return []
@@ -525,73 +982,167 @@ recommendation_engine = MovieRecommendationEngine()
 # Simplified UI-facing helpers (merged from recommender.py to reduce file count)
 USE_AI_RECOMMENDATIONS = True
 
+# Cache of AI search payloads for identical / near-duplicate queries
+_result_cache = SemanticResultCache(
+    threshold=getattr(config, 'SEMANTIC_CACHE_THRESHOLD', 0.93),
+    ttl=getattr(config, 'SEMANTIC_CACHE_TTL', 3600),
+    maxsize=getattr(config, 'SEMANTIC_CACHE_SIZE', 10000),
+)
+
+
+# Payload shapes handed to templates/jsonify. Plain dicts at runtime so they stay
+# JSON/Redis-serializable and callers can annotate them (e.g. collection_name).
+class MovieCard(TypedDict, total=False):
+    id: int
+    title: str
+    poster: str
+    rating: Any  # rounded float, or "N/A"
+    release_date: str
+    year: int  # 0 when unknown
+    overview: str
+    trailer: str
+    ai_match: str
+    collection_name: str
+    genre_ids: List[int]
+
+
+class RecommendResult(TypedDict):
+    movies: List[MovieCard]
+    collection_movies: List[MovieCard]
+    primary_movie: Optional[dict]
+
+
+def _prefetch_display_data(movies, is_ai_result=False, detail_ids=()):
+    """Fetch trailers (and details for AI results) for a batch of movies concurrently.
+
+    ``detail_ids`` adds details for extra ids to the same bulk fetch (e.g. the
+    hero movie of a basic search). Returns {movie_id: {'trailer': ..., 'details': ...}}
+    for `_format_movie_for_display`.
+    """
+    ids = [m.get('id') for m in movies]
+    detail_ids = (ids if is_ai_result else []) + list(detail_ids)
+    if not ids and not detail_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        trailers_f = ex.submit(TMDbService.get_youtube_trailers_bulk, ids)
+        details_f = ex.submit(TMDbService.get_movie_details_bulk, detail_ids) if detail_ids else None
+        trailers = trailers_f.result()
+        details = details_f.result() if details_f else {}
+    return {mid: {'trailer': trailers.get(mid), 'details': details.get(mid)} for mid in set(trailers) | set(details)}
+
 
-def _format_movie_for_display(movie_data, is_ai_result=False):
+def _format_movie_for_display(movie_data, is_ai_result=False, prefetched=None) -> MovieCard:
+    cached = (prefetched or {}).get(movie_data.get('id'))
     if is_ai_result:
         profile = movie_data.get('profile', {})
         movie_id = movie_data.get('id')
-        title = movie_data.get('title')
+        title = movie_data.get('title') or 'Unknown'
         similarity_score = movie_data.get('similarity_score', 0)
-        overview = profile.get('overview', 'No overview available.')
+        overview = profile.get('overview') or 'No overview available.'
         release_date = profile.get('release_year', 'N/A')
-        rating = profile.get('vote_average', 0)
-        details = TMDbService.get_movie_details(movie_id)
+        rating = profile.get('vote_average') or 0
+        details = cached['details'] if cached else TMDbService.get_movie_details(movie_id)
         poster_path = details.get('poster_path') if details else None
+        genre_ids = [g.get('id') for g in details.get('genres') or []] if details else None
     else:
         movie_id = movie_data.get('id')
-        title = movie_data.get('title', 'Unknown')
-        overview = movie_data.get('overview', 'No overview available.')
+        title = movie_data.get('title') or 'Unknown'
+        overview = movie_data.get('overview') or 'No overview available.'
         release_date = movie_data.get('release_date', 'N/A')
-        rating = movie_data.get('vote_average', 0)
+        rating = movie_data.get('vote_average') or 0
         poster_path = movie_data.get('poster_path')
+        genre_ids = movie_data.get('genre_ids')
         similarity_score = None
 
-    trailer_url = TMDbService.get_youtube_trailer(movie_id)
-    movie_dict = {
+    trailer_url = cached['trailer'] if cached else TMDbService.get_youtube_trailer(movie_id)
+    year_str = str(release_date or '')[:4]
+    movie_dict: MovieCard = {
         "id": movie_id,
         "title": title,
         "poster": TMDbService.format_poster_url(poster_path),
         "rating": round(rating, 1) if rating else "N/A",
         "release_date": release_date if release_date else "N/A",
+        "year": int(year_str) if year_str.isdigit() else 0,
         "overview": overview[:200] + "..." if len(overview) > 200 else overview,
         "trailer": trailer_url or ""
     }
     if similarity_score is not None:
         movie_dict["ai_match"] = f"{similarity_score}% match"
+    # Lets genre filtering run without a details lookup per movie
+    if genre_ids is not None:
+        movie_dict["genre_ids"] = genre_ids
     return movie_dict
 
 
-def _get_franchise_movies(movie_details):
+def _is_formattable(movie_data) -> bool:
+    return isinstance(movie_data, dict) and movie_data.get('id') is not None
+
+
+def _format_movies(movies, is_ai_result=False, prefetched=None) -> List[MovieCard]:
+    """Format a batch for display, skipping records without a usable id
+    or that fail to format."""
+    valid = [m for m in movies if _is_formattable(m)]
+    if len(valid) < len(movies):
+        print(f"Skipped {len(movies) - len(valid)} malformed movie record(s)")
+    formatted = []
+    for movie in valid:
+        try:
+            formatted.append(_format_movie_for_display(movie, is_ai_result=is_ai_result, prefetched=prefetched))
+        except Exception as e:
+            print(f"Error formatting movie: {e}")
+    return formatted
+
+
+def _franchise_cache_key(movie_details):
+    collection = (movie_details or {}).get('belongs_to_collection') or {}
+    return str(collection['id']) if collection.get('id') else None
+
+
+# Results built while a TMDb lookup failed are cached briefly, not for the full day
+PARTIAL_PAYLOAD_TTL = 300
+
+
+@tmdb_cache('franchise', key=_franchise_cache_key, ttl=86400, partial_ttl=PARTIAL_PAYLOAD_TTL)
+def _get_franchise_movies(movie_details) -> List[MovieCard]:
     collection_id = movie_details.get('belongs_to_collection', {}).get('id') if movie_details.get('belongs_to_collection') else None
     if not collection_id:
         return []
     collection_data = TMDbService.get_collection(collection_id)
     if not collection_data:
-        return []
-    collection_movies = []
-    for movie in collection_data.get('parts', []):
-        try:
-            formatted = _format_movie_for_display(movie, is_ai_result=False)
-            formatted['collection_name'] = collection_data.get('name', '')
-            collection_movies.append(formatted)
-        except Exception:
-            continue
+        # The movie has a collection, so an empty lookup means TMDb failed
+        return PartialResult([])
+    parts = collection_data.get('parts', [])
+    prefetched = _prefetch_display_data(parts)
+    collection_movies = _format_movies(parts, is_ai_result=False, prefetched=prefetched)
+    for formatted in collection_movies:
+        formatted['collection_name'] = collection_data.get('name', '')
     collection_movies.sort(key=lambda x: x.get('release_date', ''))
     return collection_movies
 
 
-def _build_primary_movie_payload(movie_id: int) -> dict:
-    """Assemble a rich detail payload for the primary searched movie."""
-    details = TMDbService.get_movie_details(movie_id) or {}
-    credits = TMDbService.get_movie_credits(movie_id) or {}
-    trailer = TMDbService.get_youtube_trailer(movie_id)
-    # Watch providers (link)
-    try:
-        region = getattr(config, 'DEFAULT_REGION', 'US')
-        providers = TMDbService.get_watch_providers(movie_id, region=region) or {}
-        watch_link = providers.get('link')
-    except Exception:
-        watch_link = None
+@tmdb_cache('primary_payload', key=lambda movie_id, *args, **kwargs: str(int(movie_id)), ttl=86400,
+            partial_ttl=PARTIAL_PAYLOAD_TTL)
+def _build_primary_movie_payload(movie_id: int, details: Optional[dict] = None, credits: Optional[dict] = None) -> dict:
+    """Assemble a rich detail payload for the primary searched movie.
+
+    Callers that already hold the TMDb details/credits can pass them in to
+    skip the lookups. If any lookup came back empty (failed, or genuinely no
+    trailer/providers) the payload is only cached for PARTIAL_PAYLOAD_TTL.
+    """
+    region = getattr(config, 'DEFAULT_REGION', 'US')
+    # Independent TMDb lookups run concurrently
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        details_f = ex.submit(TMDbService.get_movie_details, movie_id) if details is None else None
+        credits_f = ex.submit(TMDbService.get_movie_credits, movie_id) if credits is None else None
+        trailer_f = ex.submit(TMDbService.get_youtube_trailer, movie_id)
+        providers_f = ex.submit(TMDbService.get_watch_providers, movie_id, region=region)
+        if details_f:
+            details = details_f.result() or {}
+        if credits_f:
+            credits = credits_f.result() or {}
+        trailer = trailer_f.result()
+        # Watch providers (link); the service returns {} on failure
+        watch_link = (providers_f.result() or {}).get('link')
 
     # Director and writers
     crew = credits.get('crew', [])
@@ -626,103 +1177,150 @@ def _build_primary_movie_payload(movie_id: int) -> dict:
     }
     if cast:
         payload['cast'] = cast
+    # The TMDb wrappers return empty values on error; successful details always
+    # carry an id and credits always carry a crew list (possibly empty)
+    if not details.get('id') or 'crew' not in credits or not trailer or not watch_link:
+        return PartialResult(payload)
     return payload
 
 
+def _build_hero_and_collection(source_id: int, source_details: Optional[dict] = None):
+    """Build (collection_movies, primary_payload, complete) for a source movie.
+
+    The franchise list and hero payload are fetched concurrently; movies outside
+    any collection skip the franchise task altogether. ``complete`` is False when
+    either part came back degraded (see _build_primary_movie_payload), so callers
+    do not cache the result for longer than PARTIAL_PAYLOAD_TTL. A failure here
+    only drops the hero and collection; the movie list is still returned.
+    """
+    try:
+        if source_details is None:
+            source_details = TMDbService.get_movie_details(source_id)
+        if not source_details:
+            return [], None, False
+        if not source_details.get('belongs_to_collection'):
+            primary_payload = _build_primary_movie_payload(source_id, details=source_details)
+            return [], primary_payload, _is_complete_payload(primary_payload)
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            collection_f = ex.submit(_get_franchise_movies, source_details)
+            payload_f = ex.submit(_build_primary_movie_payload, source_id, details=source_details)
+            primary_payload = payload_f.result()
+            collection_movies = collection_f.result()
+    except Exception as e:
+        print(f"Failed to build primary movie payload: {e}")
+        return [], None, False
+    # The movie belongs to a collection, so an empty franchise list means TMDb failed
+    return collection_movies, primary_payload, bool(collection_movies) and _is_complete_payload(primary_payload)
+
+
+def _is_complete_payload(payload: Optional[dict]) -> bool:
+    """Whether a hero payload has everything _build_primary_movie_payload caches for a day."""
+    return bool(payload and payload.get('trailer') and payload.get('watch_link') and 'cast' in payload)
+
+
+# Punctuation is dropped so 'spider man' matches 'Spider-Man' and 'wall e' matches 'WALL·E'
+_NORMALIZE_TABLE = str.maketrans('', '', string.punctuation + '·')
+
+
+def _normalize_title(text: Optional[str]) -> str:
+    return (text or '').casefold().translate(_NORMALIZE_TABLE)
+
+
+def _anchor_cache_key(query: str, search_results: list) -> Optional[str]:
+    if not search_results:
+        return None
+    ids = ','.join(str(m.get('id')) for m in search_results)
+    return f"{' '.join(_normalize_title(query).split())}|{ids}"
+
+
+@tmdb_cache('search_anchor', key=_anchor_cache_key, ttl=86400)
 def _choose_search_anchor(query: str, search_results: list) -> int:
     """Select the most appropriate movie id to represent the user's search intent.
 
     Strategy:
-    1. Prefer a result whose title contains all query tokens (case-insensitive).
+    1. Prefer a result whose title contains all query tokens (case- and punctuation-insensitive).
     2. Otherwise prefer any result whose collection name (if available) contains the query tokens (so 'Harry Potter').
     3. Fallback to first search result.
     """
     if not search_results:
         return None
-    tokens = [t for t in query.lower().split() if t]
-    def title_matches(m):
-        title = (m.get('title') or '').lower()
-        return all(tok in title for tok in tokens)
+    # Query normalized once; each title/collection name once
+    tokens = _normalize_title(query).split()
     # 1. Exact token containment in title
     for m in search_results:
-        if title_matches(m):
+        title = _normalize_title(m.get('title'))
+        if all(tok in title for tok in tokens):
             return m.get('id')
-    # 2. Collection name match
+    # 2. Collection name match (details for all results fetched concurrently, checked in order)
+    details_map = TMDbService.get_movie_details_bulk([m.get('id') for m in search_results])
     for m in search_results:
-        details = TMDbService.get_movie_details(m.get('id')) or {}
+        details = details_map.get(m.get('id')) or {}
         coll = details.get('belongs_to_collection', {}) or {}
-        cname = (coll.get('name') or '').lower()
+        cname = _normalize_title(coll.get('name'))
         if cname and all(tok in cname for tok in tokens):
             return m.get('id')
     # 3. Fallback
     return search_results[0].get('id')
 
 
-def recommend(query, page=1, use_ai=None):
+def recommend(query, page=1, use_ai=None) -> RecommendResult:
     use_ai_mode = use_ai if use_ai is not None else USE_AI_RECOMMENDATIONS
     print(f"{'🤖 AI' if use_ai_mode else '🔍 Basic'} search for '{query}' (page {page})")
     movies = []
     collection_movies = []
     primary_payload = None
+    if use_ai_mode:
+        # Exact repeats are answered before paying for a query embedding
+        cached = _result_cache.get(query, page)
+        if cached is None:
+            query_emb = recommendation_engine.embed_query(query)
+            cached = _result_cache.get(query, page, query_emb)
+        if cached is not None:
+            print(f"⚡ Returning cached results for '{query}'")
+            return cached
+    # One search feeds the AI engine, the hero anchor and the basic fallback
+    search_results = TMDbService.search_movies(query, page) or []
     if use_ai_mode:
         try:
-            ai_results = recommendation_engine.get_hybrid_recommendations(query, page)
+            ai_results = recommendation_engine.get_hybrid_recommendations(query, page, search_results=search_results)
             if ai_results:
-                for ai_movie in ai_results:
-                    try:
-                        movie = _format_movie_for_display(ai_movie, is_ai_result=True)
-                        movies.append(movie)
-                    except Exception as e:
-                        print(f"Error formatting AI result: {e}")
-                        continue
+                # IMPORTANT: Primary hero should reflect the searched movie, not a recommendation
+                # Top search result anchors the hero and collection (e.g., Harry Potter);
+                # its details ride along in the bulk prefetch so the hero does not refetch them
+                source_id = _choose_search_anchor(query, search_results) if search_results else None
+                prefetched = _prefetch_display_data(ai_results, is_ai_result=True, detail_ids=[source_id] if source_id else ())
+                movies = _format_movies(ai_results, is_ai_result=True, prefetched=prefetched)
                 if movies:
                     print(f"✨ Returning {len(movies)} AI-recommended movies")
-                    # IMPORTANT: Primary hero should reflect the searched movie, not a recommendation
-                    # Fetch top search result to anchor the hero and collection (e.g., Harry Potter)
-                    search_results = TMDbService.search_movies(query, page) or []
-                    if search_results:
-                        source_id = _choose_search_anchor(query, search_results)
-                        if source_id:
-                            source_details = TMDbService.get_movie_details(source_id)
-                            if source_details:
-                                collection_movies = _get_franchise_movies(source_details)
-                                try:
-                                    primary_payload = _build_primary_movie_payload(source_id)
-                                except Exception as e:
-                                    print(f"Failed to build primary movie payload: {e}")
-                    return {'movies': movies, 'collection_movies': collection_movies, 'primary_movie': primary_payload}
+                    complete = False
+                    if source_id:
+                        source_details = (prefetched.get(source_id) or {}).get('details')
+                        collection_movies, primary_payload, complete = _build_hero_and_collection(source_id, source_details)
+                    result = {'movies': movies, 'collection_movies': collection_movies, 'primary_movie': primary_payload}
+                    # A degraded hero/franchise is cached briefly below this layer; keep it out of here
+                    if complete:
+                        _result_cache.set(query, page, query_emb, result)
+                    return result
         except Exception as e:
             print(f"AI recommendation failed: {e}, falling back to basic search")
-    results = TMDbService.search_movies(query, page)
+    results = search_results
     if not results:
         return {'movies': [], 'collection_movies': [], 'primary_movie': None}
-    for movie in results[:12]:
-        try:
-            movie_formatted = _format_movie_for_display(movie, is_ai_result=False)
-            movies.append(movie_formatted)
-        except Exception as e:
-            print(f"Error formatting movie: {e}")
-            continue
+    # One bulk prefetch covers display data and the top result's details
+    prefetched = _prefetch_display_data(results[:12], detail_ids=[results[0].get('id')])
+    movies = _format_movies(results[:12], is_ai_result=False, prefetched=prefetched)
     if movies:
         first_movie_id = movies[0].get('id')
-        first_movie_details = TMDbService.get_movie_details(first_movie_id)
-        if first_movie_details:
-            collection_movies = _get_franchise_movies(first_movie_details)
-            try:
-                primary_payload = _build_primary_movie_payload(first_movie_id)
-            except Exception as e:
-                print(f"Failed to build primary movie payload: {e}")
+        first_details = (prefetched.get(first_movie_id) or {}).get('details')
+        collection_movies, primary_payload, _ = _build_hero_and_collection(first_movie_id, first_details)
     return {'movies': movies, 'collection_movies': collection_movies, 'primary_movie': primary_payload}
 
 
-def get_movie_recommendations_by_id(movie_id, num_recommendations=12):
+def get_movie_recommendations_by_id(movie_id, num_recommendations=12) -> List[MovieCard]:
     try:
         ai_results = recommendation_engine.get_intelligent_recommendations(movie_id, num_recommendations=num_recommendations)
-        movies = []
-        for ai_movie in ai_results:
-            movie = _format_movie_for_display(ai_movie, is_ai_result=True)
-            movies.append(movie)
-        return movies
+        prefetched = _prefetch_display_data(ai_results, is_ai_result=True)
+        return _format_movies(ai_results, is_ai_result=True, prefetched=prefetched)
     except Exception as e:
         print(f"Error getting recommendations by ID: {e}")
         return []
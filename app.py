@@ -20,23 +20,67 @@ Key routes:
 """
 
 from flask import Flask, render_template, request, session, jsonify, redirect, url_for, g, flash
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
 import os
 from datetime import timedelta
-from ai_recommender import recommend, recommendation_engine, _format_movie_for_display, _build_primary_movie_payload
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from ai_recommender import recommend, recommendation_engine, _format_movie_for_display, _build_primary_movie_payload, _prefetch_display_data, PARTIAL_PAYLOAD_TTL
 from user_preference import user_engine
-from tmdb_service import TMDbService
+from tmdb_service import TMDbService, PartialResult, tmdb_cache, start_cache_warmer
+from config import ENABLE_TMDB_WARMER, TMDB_WARM_INTERVAL
 import secrets
 import logging
 import time
-import uuid
+import random
+
+try:
+    from flask_session import Session
+    import redis
+except ImportError:  # Optional: server-side sessions are skipped when not installed
+    Session = None
+try:
+    import orjson
+except ImportError:  # Optional: jsonify() falls back to Flask's stdlib encoder
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializes jsonify() bodies with orjson.
+
+    dumps()/loads() are inherited, so the session cookie and the |tojson filter
+    keep Flask's encoder; bodies orjson rejects also fall back to it.
+    """
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 # Use stable secret key (prevents session/user_id reset on each app restart)
 app.config['SECRET_KEY'] = os.getenv('APP_SECRET_KEY', 'dev-insecure-change-me')
 app.permanent_session_lifetime = timedelta(days=365)
 
+# Optional server-side sessions in Redis (ENABLE_SERVER_SESSIONS=true plus
+# SESSION_REDIS_URL or REDIS_URL): the cookie then only carries an opaque session id.
+# Off by default because switching backends drops existing cookie sessions.
+_session_redis_url = os.getenv('SESSION_REDIS_URL') or os.getenv('REDIS_URL')
+if Session is not None and _session_redis_url and os.getenv('ENABLE_SERVER_SESSIONS', 'false').lower() == 'true':
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis.Redis.from_url(_session_redis_url)
+    app.config['SESSION_PERMANENT'] = True
+    app.config['SESSION_USE_SIGNER'] = False  # random server-side ids need no HMAC
+    Session(app)
+
 # Database configuration (SQLite by default)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -64,8 +108,10 @@ class User(db.Model, UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
+    # Flask-Login memoizes the result for the rest of the request; Session.get
+    # consults the identity map before issuing a primary-key SELECT
     try:
-        return User.query.get(int(user_id))
+        return db.session.get(User, int(user_id))
     except Exception:
         return None
 
@@ -75,23 +121,21 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
 
 
+# Keep the homepage's TMDb lists refreshed in the background (TMDB_WARM=true)
+if ENABLE_TMDB_WARMER:
+    start_cache_warmer(TMDB_WARM_INTERVAL)
+
+
+# Request ids only correlate log lines, so a non-cryptographic 64-bit value is enough
+_request_id_rng = random.Random()
+
+
 @app.before_request
 def _start_timer_and_req_id():
     g._start_time = time.time()
-    g.request_id = str(uuid.uuid4())
+    g.request_id = f"{_request_id_rng.getrandbits(64):016x}"
 
 
-@app.after_request
-def _log_request(response):
-    try:
-        duration = (time.time() - getattr(g, '_start_time', time.time())) * 1000
-        logger.info(
-            f"req_id={getattr(g, 'request_id', '-') } method={request.method} path={request.path} status={response.status_code} duration_ms={duration:.1f}"
-        )
-    except Exception:
-        pass
-    return response
-
 def get_user_id():
     """Get or create user ID from session"""
     # If authenticated, use DB user id to back preferences & watchlist
@@ -110,16 +154,30 @@ def get_user_id():
     session.permanent = True
     return session['user_id']
 
+COOKIE_SECURE = os.getenv('COOKIE_SECURE', 'false').lower() == 'true'
+
+
 @app.after_request
-def persist_user_cookie(resp):
+def _finalize_response(resp):
+    """Single after-request hook: persist the user cookie, then log timing."""
     uid = session.get('user_id')
-    if uid:
-        secure = os.getenv('COOKIE_SECURE', 'false').lower() == 'true'
-        resp.set_cookie('user_id', uid, max_age=60*60*24*365, httponly=True, samesite='Lax', secure=secure)
+    # Only (re)send the cookie on first visit or when the id changed
+    if uid and request.cookies.get('user_id') != uid:
+        resp.set_cookie('user_id', uid, max_age=60*60*24*365, httponly=True, samesite='Lax', secure=COOKIE_SECURE)
+    try:
+        duration = (time.time() - getattr(g, '_start_time', time.time())) * 1000
+        logger.info(
+            f"req_id={getattr(g, 'request_id', '-') } method={request.method} path={request.path} status={resp.status_code} duration_ms={duration:.1f}"
+        )
+    except Exception:
+        pass
     return resp
 
 
 # --- Minimal CSRF protection for JSON API endpoints ---
+CSRF_PROTECTED_PATHS = frozenset({"/rate", "/watchlist/add", "/watchlist/remove", "/trailer/click"})
+
+
 def _ensure_csrf_token():
     tok = session.get('csrf_token')
     if not tok:
@@ -130,8 +188,9 @@ def _ensure_csrf_token():
 
 @app.before_request
 def _csrf_protect_api():
-    _ensure_csrf_token()
-    if request.method == 'POST' and request.path in {"/rate", "/watchlist/add", "/watchlist/remove", "/trailer/click"}:
+    # The token is minted lazily by the context processor when a page renders; static
+    # files and JSON/autocomplete calls no longer touch (and re-sign) the session here
+    if request.method == 'POST' and request.path in CSRF_PROTECTED_PATHS:
         header_tok = request.headers.get('X-CSRF-Token')
         if not header_tok or header_tok != session.get('csrf_token'):
             return jsonify({"error": "CSRF token missing or invalid"}), 400
@@ -177,13 +236,8 @@ def register():
                 return jsonify({"success": False, "message": "Please enter a valid email address."}), 400
             flash('Please enter a valid email address.')
             return render_template('register.html')
-        # Create user
-        existing = User.query.filter_by(email=email).first()
-        if existing:
-            if wants_json:
-                return jsonify({"success": False, "message": "An account with that email already exists."}), 400
-            flash('An account with that email already exists.')
-            return render_template('register.html')
+        # Create user; the unique email constraint rejects duplicates, so the
+        # common success path needs no separate existence query
         try:
             user = User(email=email)
             user.set_password(password)
@@ -194,6 +248,12 @@ def register():
                 return jsonify({"success": True, "message": "Welcome! Your account has been created."})
             flash('Welcome! Your account has been created.')
             return redirect(url_for('home'))
+        except IntegrityError:
+            db.session.rollback()
+            if wants_json:
+                return jsonify({"success": False, "message": "An account with that email already exists."}), 400
+            flash('An account with that email already exists.')
+            return render_template('register.html')
         except Exception as e:
             db.session.rollback()
             if wants_json:
@@ -231,55 +291,153 @@ def logout():
     return redirect(url_for('home'))
 
 
+SEARCH_TYPES = frozenset({"movie", "actor"})
+
+# Inclusive release-year bounds per decade filter; unknown years (0) never match
+YEAR_RANGES = {
+    "2020s": (2020, 2029),
+    "2010s": (2010, 2019),
+    "2000s": (2000, 2009),
+    "1990s": (1990, 1999),
+    "classic": (1, 1989),
+}
+
+
 def apply_filters(movies, genre_filter, year_filter, min_rating):
     """Apply filters to movie list"""
-    filtered = movies
-    
-    # Filter by genre (need to fetch genre for each movie)
-    if genre_filter != "all":
-        filtered_by_genre = []
-        for movie in filtered:
-            details = TMDbService.get_movie_details(movie.get("id"))
-            if details:
-                movie_genres = [g["name"] for g in details.get("genres", [])]
-                if genre_filter in movie_genres:
-                    filtered_by_genre.append(movie)
-        filtered = filtered_by_genre
-    
-    # Filter by year
-    if year_filter != "all":
-        if year_filter == "2020s":
-            filtered = [m for m in filtered if m.get("release_date", "").startswith(("2020", "2021", "2022", "2023", "2024", "2025"))]
-        elif year_filter == "2010s":
-            filtered = [m for m in filtered if m.get("release_date", "")[0:3] == "201"]
-        elif year_filter == "2000s":
-            filtered = [m for m in filtered if m.get("release_date", "")[0:3] == "200"]
-        elif year_filter == "1990s":
-            filtered = [m for m in filtered if m.get("release_date", "")[0:3] == "199"]
-        elif year_filter == "classic":
-            filtered = [m for m in filtered if m.get("release_date", "") < "1990"]
+    # Year and rating are local checks on the card, fused into one pass; they run
+    # first so the genre step (which may need TMDb details) only sees survivors
+    year_range = YEAR_RANGES.get(year_filter)
+    check_rating = min_rating > 0
+    filtered = [
+        m for m in movies
+        if (year_range is None or year_range[0] <= m.get("year", 0) <= year_range[1])
+        and (not check_rating or (isinstance(m.get("rating"), (int, float)) and m["rating"] >= min_rating))
+    ]
     
-    # Filter by minimum rating
-    if min_rating > 0:
-        filtered = [m for m in filtered if isinstance(m.get("rating"), (int, float)) and m.get("rating") >= min_rating]
+    # Filter by genre: match the card's genre_ids; only movies without them need details
+    if genre_filter != "all" and filtered:
+        wanted_id = {g.get("id") for g in TMDbService.get_genre_list() if g.get("name") == genre_filter}
+        missing = [m.get("id") for m in filtered if not wanted_id or m.get("genre_ids") is None]
+        details_map = TMDbService.get_movie_details_bulk(missing) if missing else {}
+
+        def has_genre(movie):
+            if wanted_id and movie.get("genre_ids") is not None:
+                return not wanted_id.isdisjoint(movie["genre_ids"])
+            details = details_map.get(movie.get("id")) or {}
+            return genre_filter in [g.get("name") for g in details.get("genres", [])]
+
+        filtered = [m for m in filtered if has_genre(m)]
     
     return filtered
 
 
+def _rating_key(movie):
+    rating = movie.get("rating")
+    return float(rating) if isinstance(rating, (int, float)) else 0.0
+
+
+def _release_key(movie):
+    return movie.get("release_date", "")
+
+
+def _title_key(movie):
+    return movie.get("title", "")
+
+
+# sort_by -> (key function, reverse); sorted() evaluates each key once per movie
+SORT_KEYS = {
+    "rating_desc": (_rating_key, True),
+    "rating_asc": (_rating_key, False),
+    "year_desc": (_release_key, True),
+    "year_asc": (_release_key, False),
+    "title": (_title_key, False),
+}
+
+
 def apply_sorting(movies, sort_by):
     """Apply sorting to movie list"""
-    if sort_by == "rating_desc":
-        return sorted(movies, key=lambda m: float(m.get("rating", 0)) if isinstance(m.get("rating"), (int, float)) else 0, reverse=True)
-    elif sort_by == "rating_asc":
-        return sorted(movies, key=lambda m: float(m.get("rating", 0)) if isinstance(m.get("rating"), (int, float)) else 0)
-    elif sort_by == "year_desc":
-        return sorted(movies, key=lambda m: m.get("release_date", ""), reverse=True)
-    elif sort_by == "year_asc":
-        return sorted(movies, key=lambda m: m.get("release_date", ""))
-    elif sort_by == "title":
-        return sorted(movies, key=lambda m: m.get("title", ""))
-    else:  # relevance (default)
+    if sort_by not in SORT_KEYS:  # relevance (default)
         return movies
+    key, reverse = SORT_KEYS[sort_by]
+    return sorted(movies, key=key, reverse=reverse)
+
+
+@tmdb_cache('homepage_sections', key=lambda: 'default', ttl=900)
+def _build_homepage_sections():
+    """Build the anonymous homepage rows (latest + trending heroes and grids).
+
+    The rows are identical for every visitor and change slowly, so the whole
+    bundle is memoized (in-process + Redis when configured) for 15 minutes.
+    Returns None when nothing could be loaded so failures are not cached.
+    """
+    latest_hero = None
+    latest_movies = []
+    trending_hero = None
+    trending_movies = []
+    try:
+        # Prefer a "latest" hero that actually has usable details & an image.
+        # TMDb /movie/latest often points to an obscure or incomplete record, so we
+        # scan the now playing list for the first movie with a poster and overview.
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            now_playing_f = ex.submit(TMDbService.get_now_playing_movies, page=1)
+            trending_f = ex.submit(TMDbService.get_trending_movies, 'day')
+            now_playing = now_playing_f.result() or []
+            t_list = trending_f.result() or []
+        # One deduplicated trailer fetch serves both rows (titles often appear in both)
+        prefetched = _prefetch_display_data(now_playing[:13] + t_list[1:13])
+        candidate_hero = None
+        for m in now_playing:
+            if m.get('poster_path') and (m.get('overview') or '').strip():
+                candidate_hero = m
+                break
+        # Fallback to first item even if missing overview (keeps page populated)
+        if not candidate_hero and now_playing:
+            candidate_hero = now_playing[0]
+        if candidate_hero and candidate_hero.get('id'):
+            try:
+                latest_hero = _build_primary_movie_payload(candidate_hero.get('id'))
+                # Ensure hero has a poster; if not, try next candidate with poster
+                if latest_hero and (not latest_hero.get('poster') or 'no_image' in latest_hero.get('poster','')):
+                    for m in now_playing:
+                        if m is candidate_hero:
+                            continue
+                        if m.get('poster_path'):
+                            latest_hero = _build_primary_movie_payload(m.get('id'))
+                            break
+            except Exception:
+                latest_hero = None
+        # Build latest movies list (exclude hero id) limit 12
+        hero_id = latest_hero.get('id') if latest_hero else None
+        for m in now_playing:
+            if hero_id and m.get('id') == hero_id:
+                continue
+            try:
+                formatted = _format_movie_for_display(m, is_ai_result=False, prefetched=prefetched)
+                latest_movies.append(formatted)
+                if len(latest_movies) >= 12:
+                    break
+            except Exception:
+                continue
+        # Trending section
+        if t_list:
+            trending_hero = _build_primary_movie_payload(t_list[0].get('id'))
+            for m in t_list[1:13]:
+                try:
+                    formatted = _format_movie_for_display(m, is_ai_result=False, prefetched=prefetched)
+                    trending_movies.append(formatted)
+                except Exception:
+                    continue
+    except Exception as e:
+        logger.warning(f"Failed to build default homepage content: {e}")
+    if not (latest_hero or latest_movies or trending_hero or trending_movies):
+        return None
+    return {
+        'latest_hero': latest_hero,
+        'latest_movies': latest_movies,
+        'trending_hero': trending_hero,
+        'trending_movies': trending_movies,
+    }
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -308,7 +466,7 @@ def home():
         query = request.form.get("movie_title", "").strip()
         search_type = request.form.get("search_type", "movie")
         # Input validation
-        if search_type not in {"movie", "actor"}:
+        if search_type not in SEARCH_TYPES:
             search_type = "movie"
         if len(query) > 100:
             query = query[:100]
@@ -333,9 +491,10 @@ def home():
                 recommended_movies = result.get('movies', [])
                 collection_movies = result.get('collection_movies', [])
                 primary_movie = result.get('primary_movie')
-                # Store primary movie id for explanation endpoint
-                if primary_movie and primary_movie.get('id'):
-                    session['last_primary_id'] = primary_movie.get('id')
+                # Fallback source for /explain until the client sends ?source=;
+                # assigning only on change avoids re-sending the cookie each search
+                if primary_movie and primary_movie.get('id') and session.get('last_primary_id') != primary_movie['id']:
+                    session['last_primary_id'] = primary_movie['id']
             else:
                 # Backward compatibility
                 recommended_movies = result
@@ -351,9 +510,8 @@ def home():
             # Apply sorting
             recommended_movies = apply_sorting(recommended_movies, sort_by)
             
-            # Track views
-            for movie in recommended_movies:
-                user_engine.track_view(user_id, movie.get("id"))
+            # Track views (one profile edit for the whole page)
+            user_engine.track_views(user_id, [movie.get("id") for movie in recommended_movies])
 
         elif query and search_type == "actor":
             # Redirect to first matching actor (simple flow); else do people search page later
@@ -364,64 +522,20 @@ def home():
 
     # If GET and no query, populate default homepage content (latest + trending)
     if request.method == "GET" and not query:
-        try:
-            # Prefer a "latest" hero that actually has usable details & an image.
-            # TMDb /movie/latest often points to an obscure or incomplete record, so we
-            # scan the now playing list for the first movie with a poster and overview.
-            now_playing = TMDbService.get_now_playing_movies(page=1) or []
-            candidate_hero = None
-            for m in now_playing:
-                if m.get('poster_path') and (m.get('overview') or '').strip():
-                    candidate_hero = m
-                    break
-            # Fallback to first item even if missing overview (keeps page populated)
-            if not candidate_hero and now_playing:
-                candidate_hero = now_playing[0]
-            if candidate_hero and candidate_hero.get('id'):
-                try:
-                    latest_hero = _build_primary_movie_payload(candidate_hero.get('id'))
-                    # Ensure hero has a poster; if not, try next candidate with poster
-                    if latest_hero and (not latest_hero.get('poster') or 'no_image' in latest_hero.get('poster','')):
-                        for m in now_playing:
-                            if m is candidate_hero:
-                                continue
-                            if m.get('poster_path'):
-                                latest_hero = _build_primary_movie_payload(m.get('id'))
-                                break
-                except Exception:
-                    latest_hero = None
-            # Build latest movies list (exclude hero id) limit 12
-            hero_id = latest_hero.get('id') if latest_hero else None
-            for m in now_playing:
-                if hero_id and m.get('id') == hero_id:
-                    continue
-                try:
-                    formatted = _format_movie_for_display(m, is_ai_result=False)
-                    latest_movies.append(formatted)
-                    if len(latest_movies) >= 12:
-                        break
-                except Exception:
-                    continue
-            # Trending section
-            t_list = TMDbService.get_trending_movies('day') or []
-            if t_list:
-                trending_hero = _build_primary_movie_payload(t_list[0].get('id'))
-                for m in t_list[1:13]:
-                    try:
-                        formatted = _format_movie_for_display(m, is_ai_result=False)
-                        trending_movies.append(formatted)
-                    except Exception:
-                        continue
-        except Exception as e:
-            logger.warning(f"Failed to build default homepage content: {e}")
+        sections = _build_homepage_sections()
+        if sections:
+            latest_hero = sections['latest_hero']
+            latest_movies = sections['latest_movies']
+            trending_hero = sections['trending_hero']
+            trending_movies = sections['trending_movies']
 
     # Get user stats for display
-    user_stats = user_engine.get_user_stats(user_id)
-    profile = user_engine.load_user_profile(user_id)
+    profile = user_engine.get_profile_snapshot(user_id)
+    user_stats = user_engine.get_user_stats(user_id, profile=profile)
     
-    # Get genre list for filter dropdown
-    genres = TMDbService.get_genre_list()
-    if query and not genres:
+    # The genre list doubles as a TMDb health probe after a search; the templates
+    # do not render it, so plain homepage views skip the lookup entirely
+    if query and not TMDbService.get_genre_list():
         try:
             flash("Some information couldn't load from TMDb. Showing partial results.")
         except Exception:
@@ -436,7 +550,6 @@ def home():
         page=page,
         user_stats=user_stats,
         watchlist=profile.get("watchlist", []),
-        genres=genres,
         current_genre=genre_filter,
         current_year=year_filter,
         current_rating=min_rating,
@@ -454,14 +567,23 @@ def explain_recommendation(movie_id: int):
     """Return an explanation for why a recommended movie appeared.
 
     Uses data stored on the recommendation card plus fresh TMDb lookups.
-    Relies on session['last_primary_id'] for the context (source movie).
+    The source movie comes from ``?source=<id>`` (the card's data-source-id),
+    or else from the last search's hero kept in session['last_primary_id'].
     """
-    source_id = session.get('last_primary_id')
+    source_id = request.args.get('source', type=int) or session.get('last_primary_id')
     if not source_id:
-        return jsonify({"error": "No source movie in session"}), 400
+        return jsonify({"error": "No source movie: pass ?source=<id> or search first"}), 400
     try:
-        source = TMDbService.get_movie_details(source_id) or {}
-        target = TMDbService.get_movie_details(movie_id) or {}
+        # The four lookups are independent; run them concurrently
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            source_f = ex.submit(TMDbService.get_movie_details, source_id)
+            target_f = ex.submit(TMDbService.get_movie_details, movie_id)
+            source_credits_f = ex.submit(TMDbService.get_movie_credits, source_id)
+            target_credits_f = ex.submit(TMDbService.get_movie_credits, movie_id)
+            source = source_f.result() or {}
+            target = target_f.result() or {}
+            source_credits = source_credits_f.result() or {}
+            target_credits = target_credits_f.result() or {}
         if not target:
             return jsonify({"error": "Target movie not found"}), 404
         # Shared genres
@@ -469,8 +591,6 @@ def explain_recommendation(movie_id: int):
         target_genres = {g.get('name') for g in target.get('genres', [])}
         shared_genres = sorted(source_genres.intersection(target_genres))
         # Simple cast overlap (top 10 names)
-        source_credits = TMDbService.get_movie_credits(source_id) or {}
-        target_credits = TMDbService.get_movie_credits(movie_id) or {}
         source_cast = {c.get('name') for c in (source_credits.get('cast') or [])[:10] if c.get('name')}
         target_cast = {c.get('name') for c in (target_credits.get('cast') or [])[:10] if c.get('name')}
         shared_cast = sorted(source_cast.intersection(target_cast))
@@ -563,29 +683,48 @@ def remove_from_watchlist():
     return jsonify({"success": True, "watchlist": watchlist})
 
 
+def _truncate_overview(text, limit=200):
+    text = text or ""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _hydrate_movies(movie_ids, include_trailer=False):
+    """Fetch details (and optionally trailers) for many movies concurrently.
+
+    Returns ({movie_id: details}, {movie_id: trailer_url}); callers iterate their
+    own id list to keep its order.
+    """
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        details_f = ex.submit(TMDbService.get_movie_details_bulk, movie_ids)
+        trailers_f = ex.submit(TMDbService.get_youtube_trailers_bulk, movie_ids) if include_trailer else None
+        return details_f.result(), (trailers_f.result() if trailers_f else {})
+
+
 @app.route("/watchlist")
 def view_watchlist():
     """View user's watchlist"""
     user_id = get_user_id()
-    profile = user_engine.load_user_profile(user_id)
+    profile = user_engine.get_profile_snapshot(user_id)
     
     # Get movie details for watchlist items
+    watchlist_ids = list(profile.get("watchlist", ()))
+    details_map, trailers = _hydrate_movies(watchlist_ids, include_trailer=True)
     watchlist_movies = []
-    for movie_id in profile.get("watchlist", []):
-        movie = TMDbService.get_movie_details(movie_id)
+    for movie_id in watchlist_ids:
+        movie = details_map.get(movie_id)
         if movie:
-            trailer_url = TMDbService.get_youtube_trailer(movie_id)
+            trailer_url = trailers.get(movie_id)
             watchlist_movies.append({
                 "id": movie_id,
                 "title": movie.get("title"),
                 "poster": TMDbService.format_poster_url(movie.get("poster_path")),
                 "rating": round(movie.get("vote_average", 0), 1),
                 "release_date": movie.get("release_date", "N/A"),
-                "overview": movie.get("overview", "")[:200] + "...",
+                "overview": _truncate_overview(movie.get("overview")),
                 "trailer": trailer_url or ""
             })
     
-    user_stats = user_engine.get_user_stats(user_id)
+    user_stats = user_engine.get_user_stats(user_id, profile=profile)
     
     return render_template(
         "watchlist.html",
@@ -597,9 +736,12 @@ def view_watchlist():
 @app.route("/actor/<int:person_id>")
 def actor_page(person_id: int):
     """Show actor profile and filmography."""
-    # Fetch person details and credits
-    details = TMDbService.get_person_details(person_id)
-    credits = TMDbService.get_person_movie_credits(person_id) or {}
+    # Fetch person details and credits concurrently
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        details_f = ex.submit(TMDbService.get_person_details, person_id)
+        credits_f = ex.submit(TMDbService.get_person_movie_credits, person_id)
+        details = details_f.result()
+        credits = credits_f.result() or {}
 
     if not details:
         return render_template("index.html", recommended_movies=[], collection_movies=[], query="", page=1)
@@ -614,15 +756,15 @@ def actor_page(person_id: int):
                 "title": m.get("title"),
                 "poster": TMDbService.format_poster_url(m.get("poster_path")),
                 "rating": round(m.get("vote_average", 0), 1),
-                "release_date": m.get("release_date", ""),
-                "overview": (m.get("overview") or "")[:200] + ("..." if (m.get("overview") and len(m.get("overview")) > 200) else ""),
+                "release_date": m.get("release_date") or "",
+                "overview": _truncate_overview(m.get("overview")),
                 "character": m.get("character", ""),
             })
         except Exception:
             continue
 
-    # Sort by popularity or release date (desc)
-    movies.sort(key=lambda x: (x.get("release_date", "")), reverse=True)
+    # Sort by release date (desc); ISO dates order correctly as strings
+    movies.sort(key=itemgetter("release_date"), reverse=True)
 
     actor = {
         "id": details.get("id"),
@@ -636,14 +778,14 @@ def actor_page(person_id: int):
 
     # Reuse watchlist for button labels
     user_id = get_user_id()
-    profile = user_engine.load_user_profile(user_id)
+    profile = user_engine.get_profile_snapshot(user_id)
 
     return render_template(
         "actor.html",
         actor=actor,
         movies=movies,
         watchlist=profile.get("watchlist", []),
-        user_stats=user_engine.get_user_stats(user_id),
+        user_stats=user_engine.get_user_stats(user_id, profile=profile),
     )
 
 
@@ -651,13 +793,15 @@ def actor_page(person_id: int):
 def user_profile():
     """View user profile and stats"""
     user_id = get_user_id()
-    profile = user_engine.load_user_profile(user_id)
-    stats = user_engine.get_user_stats(user_id)
+    profile = user_engine.get_profile_snapshot(user_id)
+    stats = user_engine.get_user_stats(user_id, profile=profile)
     
     # Get rated movies with details
+    ratings = profile.get("ratings", {})
+    details_map, _ = _hydrate_movies([int(movie_id) for movie_id in ratings])
     rated_movies = []
-    for movie_id, rating_data in profile.get("ratings", {}).items():
-        movie = TMDbService.get_movie_details(int(movie_id))
+    for movie_id, rating_data in ratings.items():
+        movie = details_map.get(int(movie_id))
         if movie:
             rated_movies.append({
                 "id": movie_id,
@@ -692,29 +836,31 @@ def track_trailer_click():
 @app.route("/random")
 def random_movie():
     """Pick a random popular/trending movie and show a single hero with full details."""
-    import random
     user_id = get_user_id()
-    # Pool: popular + trending day page 1
-    pool = []
+    # Pool: popular + trending day page 1 (first 20 of each), fetched concurrently
     try:
-        pop = TMDbService.get_popular_movies(page=1) or []
-        trend = TMDbService.get_trending_movies('day') or []
-        pool = pop[:20] + trend[:20]
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            pop_f = ex.submit(TMDbService.get_popular_movies, page=1)
+            trend_f = ex.submit(TMDbService.get_trending_movies, 'day')
+            pop = (pop_f.result() or [])[:20]
+            trend = (trend_f.result() or [])[:20]
     except Exception:
-        pool = []
-    if not pool:
+        pop, trend = [], []
+    if not pop and not trend:
         return redirect(url_for('home'))
-    anchor = random.choice(pool)
+    # Index across both lists instead of concatenating them
+    i = random.randrange(len(pop) + len(trend))
+    anchor = pop[i] if i < len(pop) else trend[i - len(pop)]
     movie_id = anchor.get('id')
     primary_movie = None
     recommended_movies = []  # Intentionally empty for single random view
     collection_movies = []   # Suppress franchise list for simplicity
     if movie_id:
         try:
-            # Build hero payload
-            primary_movie = _build_primary_movie_payload(movie_id)
-            # Inject extended details (budget/revenue) if available
+            # Build hero payload from a single details lookup
             details_full = TMDbService.get_movie_details(movie_id) or {}
+            primary_movie = _build_primary_movie_payload(movie_id, details=details_full)
+            # Inject extended details (budget/revenue) if available
             if primary_movie is not None:
                 primary_movie['budget'] = details_full.get('budget')
                 primary_movie['revenue'] = details_full.get('revenue')
@@ -726,9 +872,8 @@ def random_movie():
                     primary_movie['keywords'] = []
         except Exception:
             primary_movie = None
-    profile = user_engine.load_user_profile(user_id)
-    user_stats = user_engine.get_user_stats(user_id)
-    genres = TMDbService.get_genre_list()
+    profile = user_engine.get_profile_snapshot(user_id)
+    user_stats = user_engine.get_user_stats(user_id, profile=profile)
     return render_template(
         'index.html',
         recommended_movies=recommended_movies,
@@ -738,7 +883,6 @@ def random_movie():
         page=1,
         user_stats=user_stats,
         watchlist=profile.get('watchlist', []),
-        genres=genres,
         current_genre='all',
         current_year='all',
         current_rating='0',
@@ -752,6 +896,23 @@ def random_movie():
     )
 
 
+# Feedback clicks only update the profile, so the write (and, for "more like", the
+# TMDb enrichment) runs after the response. One worker keeps each user's
+# read-modify-write profile updates in click order.
+_feedback_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feedback")
+
+
+def _run_feedback_task(event, fn, *args, **kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        logger.warning(f"event={event} feedback write failed: {e}")
+
+
+def _enqueue_feedback(event, fn, *args, **kwargs):
+    _feedback_writer.submit(_run_feedback_task, event, fn, *args, **kwargs)
+
+
 @app.route("/feedback/not_interested", methods=["POST"])
 def feedback_not_interested():
     user_id = get_user_id()
@@ -759,11 +920,35 @@ def feedback_not_interested():
         movie_id = int(request.form.get("movie_id"))
     except Exception:
         return jsonify({"success": False, "error": "Invalid movie_id"}), 400
-    user_engine.track_not_interested(user_id, movie_id)
+    _enqueue_feedback("not_interested", user_engine.track_not_interested, user_id, movie_id)
     logger.info(f"event=not_interested user={user_id} movie={movie_id} req_id={getattr(g,'request_id','-')}")
     return jsonify({"success": True})
 
 
+@tmdb_cache('movie_features', key=lambda movie_id: str(int(movie_id)), ttl=86400)
+def _movie_preference_features(movie_id):
+    """Genres/director/cast/keywords used to update preferences (cached 24h).
+
+    None (not cached) when the TMDb lookup failed, so a later call retries it.
+    """
+    movie_details = TMDbService.get_movie_full(movie_id)
+    if not movie_details:
+        return None
+    credits = movie_details.get("credits") or {}
+    return {
+        "genres": movie_details.get("genres", []),
+        "director": [p.get('name') for p in (credits.get('crew') or []) if p.get('job') == 'Director'],
+        "cast": [p.get('name') for p in (credits.get('cast') or [])[:5]],
+        "keywords": (movie_details.get("keywords") or {}).get("keywords", [])
+    }
+
+
+def _track_more_like(user_id, movie_id):
+    # Enrich preferences using movie features
+    enriched = _movie_preference_features(movie_id)
+    user_engine.track_more_like(user_id, movie_id, movie_data=enriched)
+
+
 @app.route("/feedback/more_like", methods=["POST"])
 def feedback_more_like():
     user_id = get_user_id()
@@ -771,16 +956,7 @@ def feedback_more_like():
         movie_id = int(request.form.get("movie_id"))
     except Exception:
         return jsonify({"success": False, "error": "Invalid movie_id"}), 400
-    # Enrich preferences using movie features
-    movie_details = TMDbService.get_movie_details(movie_id) or {}
-    credits = TMDbService.get_movie_credits(movie_id) or {}
-    enriched = {
-        "genres": movie_details.get("genres", []),
-        "director": [p.get('name') for p in (credits.get('crew') or []) if p.get('job') == 'Director'],
-        "cast": [p.get('name') for p in (credits.get('cast') or [])[:5]],
-        "keywords": TMDbService.get_movie_keywords(movie_id) or []
-    }
-    user_engine.track_more_like(user_id, movie_id, movie_data=enriched)
+    _enqueue_feedback("more_like", _track_more_like, user_id, movie_id)
     logger.info(f"event=more_like user={user_id} movie={movie_id} req_id={getattr(g,'request_id','-')}")
     return jsonify({"success": True})
 
@@ -793,6 +969,14 @@ def autocomplete():
     
     if not query or len(query) < 2:
         return jsonify([])
+    return jsonify(_autocomplete_suggestions(query, search_type) or [])
+
+
+@tmdb_cache('autocomplete', key=lambda query, search_type: f"{search_type}:{' '.join(query[:40].lower().split())}", ttl=3600)
+def _autocomplete_suggestions(query, search_type):
+    """Suggestions for the search box (cached 1h; empty results are not cached)."""
+    # Search exactly what the cache key covers
+    query = query[:40]
     if search_type == "actor":
         people = TMDbService.search_people(query, page=1) or []
         result = []
@@ -804,74 +988,89 @@ def autocomplete():
                 "known_for_department": p.get("known_for_department", ""),
                 "type": "person",
             })
-        return jsonify(result)
-    else:
-        suggestions = TMDbService.autocomplete_search(query, limit=7) or []
-        # annotate type so client can branch
-        for s in suggestions:
-            s["type"] = "movie"
-        return jsonify(suggestions)
+        return result or None
+    suggestions = TMDbService.autocomplete_search(query, limit=7) or []
+    # annotate type so client can branch
+    for s in suggestions:
+        s["type"] = "movie"
+    return suggestions or None
 
 
-@app.route("/movie/<int:movie_id>", methods=["GET"])
-def get_movie_details(movie_id):
-    """Get full movie details including cast, crew, and reviews"""
-    try:
-        # Get basic details
-        details = TMDbService.get_movie_details(movie_id)
+_MODAL_PASSTHROUGH_KEYS = ("id", "title", "overview", "release_date", "runtime")
+
+
+@tmdb_cache('movie_modal', key=lambda movie_id: str(int(movie_id)), ttl=21600,
+            partial_ttl=PARTIAL_PAYLOAD_TTL)
+def _build_movie_modal_payload(movie_id):
+    """Full details for the movie modal; None when TMDb has no such movie.
+
+    Cached for 6h (the watch-provider link is the most volatile field). If the
+    credits, trailer or providers lookup came back empty, only for
+    PARTIAL_PAYLOAD_TTL.
+    """
+    from config import DEFAULT_REGION
+
+    # Details, credits, trailer and watch providers are independent lookups
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        details_f = ex.submit(TMDbService.get_movie_details, movie_id)
+        credits_f = ex.submit(TMDbService.get_movie_credits, movie_id)
+        trailer_f = ex.submit(TMDbService.get_youtube_trailer, movie_id)
+        providers_f = ex.submit(TMDbService.get_watch_providers, movie_id, region=DEFAULT_REGION)
+        details = details_f.result()
         if not details:
-            return jsonify({"error": "Movie not found"}), 404
-        
-        # Get credits (cast and crew)
-        credits = TMDbService.get_movie_credits(movie_id)
-        
-        # Get trailer
-        trailer = TMDbService.get_youtube_trailer(movie_id)
-        
-        # Watch providers
+            return None
+        credits = credits_f.result()
+        trailer = trailer_f.result()
         try:
-            from config import DEFAULT_REGION
-            providers = TMDbService.get_watch_providers(movie_id, region=DEFAULT_REGION)
+            providers = providers_f.result()
         except Exception:
             providers = {}
 
-        # Format response
-        response = {
-            "id": details.get("id"),
-            "title": details.get("title"),
-            "overview": details.get("overview"),
-            "release_date": details.get("release_date"),
-            "rating": details.get("vote_average"),
-            "runtime": details.get("runtime"),
-            "genres": [g["name"] for g in details.get("genres", [])],
-            "poster": TMDbService.format_poster_url(details.get("poster_path")),
-            "backdrop": TMDbService.format_poster_url(details.get("backdrop_path")),
-            "trailer": trailer,
-            "watch_link": providers.get("link") if isinstance(providers, dict) else None,
-            "tagline": details.get("tagline", ""),
-            "budget": details.get("budget", 0),
-            "revenue": details.get("revenue", 0),
-        }
+    # Format response: TMDb fields passed through as-is, then renamed/derived ones
+    response = {key: details.get(key) for key in _MODAL_PASSTHROUGH_KEYS}
+    response.update({
+        "rating": details.get("vote_average"),
+        "genres": [g["name"] for g in details.get("genres", [])],
+        "poster": TMDbService.format_poster_url(details.get("poster_path")),
+        "backdrop": TMDbService.format_poster_url(details.get("backdrop_path")),
+        "trailer": trailer,
+        "watch_link": providers.get("link") if isinstance(providers, dict) else None,
+        "tagline": details.get("tagline", ""),
+        "budget": details.get("budget", 0),
+        "revenue": details.get("revenue", 0),
+    })
+    
+    # Add cast (top 10)
+    if credits:
+        response["cast"] = [
+            {
+                "name": person.get("name"),
+                "character": person.get("character"),
+                "profile": TMDbService.format_poster_url(person.get("profile_path"))
+            }
+            for person in credits.get("cast", [])[:10]
+                            ]
         
-        # Add cast (top 10)
-        if credits:
-            response["cast"] = [
-                {
-                    "name": person.get("name"),
-                    "character": person.get("character"),
-                    "profile": TMDbService.format_poster_url(person.get("profile_path"))
-                }
-                for person in credits.get("cast", [])[:10]
-                                ]
-            
-            # Add director and key crew
-            crew = credits.get("crew", [])
-            directors = [p["name"] for p in crew if p.get("job") == "Director"]
-            writers = [p["name"] for p in crew if p.get("job") in ["Writer", "Screenplay"]]
-            
-            response["director"] = directors[0] if directors else "Unknown"
-            response["writers"] = writers[:3] if writers else []
+        # Add director and key crew
+        crew = credits.get("crew", [])
+        directors = [p["name"] for p in crew if p.get("job") == "Director"]
+        writers = [p["name"] for p in crew if p.get("job") in ["Writer", "Screenplay"]]
         
+        response["director"] = directors[0] if directors else "Unknown"
+        response["writers"] = writers[:3] if writers else []
+    
+    if not credits or not trailer or not response["watch_link"]:
+        return PartialResult(response)
+    return response
+
+
+@app.route("/movie/<int:movie_id>", methods=["GET"])
+def get_movie_details(movie_id):
+    """Get full movie details including cast, crew, and reviews"""
+    try:
+        response = _build_movie_modal_payload(movie_id)
+        if not response:
+            return jsonify({"error": "Movie not found"}), 404
         return jsonify(response)
     
     except Exception as e:
@@ -7,7 +7,7 @@ Kept only for backwards compatibility; delegates to movielens module.
 """
 import argparse
 import os
-from movielens import load_movielens, build_and_save_cf_model
+from movielens import load_movielens, build_and_save_cf_model, similarity_model_exists
 
 
 def parse_args():
@@ -17,6 +17,11 @@ def parse_args():
     p.add_argument("--top-k", type=int, default=50)
     p.add_argument("--min-item-ratings", type=int, default=5)
     p.add_argument("--block-size", type=int, default=500)
+    p.add_argument("--n-jobs", type=int, default=1, help="Worker processes for the similarity build (-1 = all cores)")
+    p.add_argument("--bm25", action="store_true", help="BM25-weight ratings before computing cosine similarities")
+    p.add_argument("--min-sim", type=float, default=0.0, help="Drop neighbours below this similarity (e.g. 0.01)")
+    p.add_argument("--backend", choices=("auto", "similaripy", "blockwise"), default="auto",
+                   help="Similarity backend; auto uses similaripy when installed")
     return p.parse_args()
 
 
@@ -31,8 +36,12 @@ def main():
         top_k=args.top_k,
         min_item_ratings=args.min_item_ratings,
         block_size=args.block_size,
+        n_jobs=args.n_jobs,
+        bm25=args.bm25,
+        min_sim=args.min_sim,
+        backend=args.backend,
     )
-    if model_path and os.path.exists(model_path):
+    if model_path and similarity_model_exists(model_path):
         print(f"✅ CF model saved: {model_path}")
     else:
         print("❌ Failed to build CF model")
@@ -2,12 +2,26 @@
 Side-by-side comparison: Basic Search vs AI Recommendations
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from tmdb_service import TMDbService
 from ai_recommender import recommendation_engine
 
-def compare_search_methods(query):
+def fetch_comparison(query):
+    """Run the basic search and AI recommendations for a query (network-bound)"""
+    basic_results = TMDbService.search_movies(query, page=1)
+    ai_results = None
+    if basic_results:
+        ai_results = recommendation_engine.get_intelligent_recommendations(
+            basic_results[0]['id'],
+            num_recommendations=5
+        )
+    return basic_results, ai_results
+
+def compare_search_methods(query, fetched=None):
     """Compare basic search vs AI recommendations"""
     
+    basic_results, ai_results = fetched if fetched is not None else fetch_comparison(query)
+    
     print("=" * 80)
     print(f"🔍 COMPARISON: '{query}'")
     print("=" * 80)
@@ -16,7 +30,6 @@ def compare_search_methods(query):
     print("\n📋 BASIC SEARCH (TMDb Native)")
     print("-" * 80)
     
-    basic_results = TMDbService.search_movies(query, page=1)
     if basic_results:
         for i, movie in enumerate(basic_results[:5], 1):
             print(f"{i}. {movie.get('title', 'Unknown')}")
@@ -32,12 +45,6 @@ def compare_search_methods(query):
     print("-" * 80)
     
     if basic_results:
-        movie_id = basic_results[0]['id']
-        ai_results = recommendation_engine.get_intelligent_recommendations(
-            movie_id,
-            num_recommendations=5
-        )
-        
         if ai_results:
             for i, rec in enumerate(ai_results, 1):
                 profile = rec['profile']
@@ -71,8 +78,12 @@ def main():
         "The Dark Knight"
     ]
     
-    for query in test_queries:
-        compare_search_methods(query)
+    # Fetch every comparison up front in parallel; printing stays one query at a time
+    with ThreadPoolExecutor(max_workers=len(test_queries)) as ex:
+        fetched = list(ex.map(fetch_comparison, test_queries))
+    
+    for query, data in zip(test_queries, fetched):
+        compare_search_methods(query, fetched=data)
         input("Press Enter to continue to next comparison...")
     
     print("\n✨ Comparison complete! Notice how AI finds thematically similar movies,")
@@ -7,18 +7,43 @@ import os
 # Path to the CF model pickle (used by ai_recommender)
 CF_MODEL_PATH = os.getenv("CF_MODEL_PATH", os.path.join("models", "movielens_cf.pkl"))
 
+# Path to the fitted TF-IDF vectorizer (vocabulary/IDF reused across queries).
+# The vocabulary is frozen once fitted: delete this file to refit after changing
+# TFIDF_WARMUP_PAGES, and periodically (e.g. monthly) so newer directors/cast
+# are not out of vocabulary.
+TFIDF_MODEL_PATH = os.getenv("TFIDF_MODEL_PATH", os.path.join("models", "tfidf_vectorizer.joblib"))
+# Pages of TMDb popular movies (20 per page) added to the corpus when fitting the
+# vocabulary; 10 pages = the top 200
+TFIDF_WARMUP_PAGES = int(os.getenv("TFIDF_WARMUP_PAGES", "10"))
+
 # Optional MovieLens dataset path for tag enrichment
 MOVIELENS_PATH = os.getenv("MOVIELENS_PATH")
 
 # Feature flags
 ENABLE_CONCEPT_EXPANSION = os.getenv("ENABLE_CONCEPT_EXPANSION", "true").lower() == "true"
 
+# Warm up models and the TF-IDF vocabulary in a background thread at startup
+ENABLE_WARMUP = os.getenv("ENABLE_WARMUP", "true").lower() == "true"
+
+# Background thread that re-fetches trending/popular/now-playing lists shortly before
+# their cache entries expire, so homepage visitors never pay for the refresh
+ENABLE_TMDB_WARMER = os.getenv("TMDB_WARM", "false").lower() == "true"
+TMDB_WARM_INTERVAL = int(os.getenv("TMDB_WARM_INTERVAL", "570"))
+
 # Default region for watch providers (TMDb JustWatch integration)
 DEFAULT_REGION = os.getenv("DEFAULT_REGION", "US").upper()
 
 # External model (Hugging Face) for embeddings-based similarity
 ENABLE_HF_MODEL = os.getenv("ENABLE_HF_MODEL", "false").lower() == "true"
 HF_MODEL_NAME = os.getenv("HF_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+# Directory for the persistent embeddings cache (requires diskcache)
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join(".cache", "embeddings"))
+
+# Cache of AI search results: exact query match, plus nearest cached query by
+# embedding cosine similarity when the embeddings model is enabled
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "10000"))
 
 # Optional Cross-Encoder reranker to refine top-K candidates
 ENABLE_RERANKER = os.getenv("ENABLE_RERANKER", "false").lower() == "true"
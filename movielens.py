@@ -4,17 +4,20 @@ Functions provided:
 - load_movielens(path) -> ratings, movies, links
 - build_and_save_cf_model(ratings, links, ...) -> model_path
 - load_similarity_model(path) -> dict
+- similarity_model_exists(path) -> bool
 - recommend_similar_by_tmdbId(tmdb_id, model, top_n) -> List[int]
 - load_tags_enrichment(dataset_path, min_tag_freq, max_tags_per_movie) -> Dict[tmdbId, List[str]]
 
 CLI usage (PowerShell):
-python movielens.py build --dataset-path "C:\\path\\to\\ml-32m" --blockwise --block-size 1000 --min-item-ratings 10 --top-k 75
+python movielens.py build --dataset-path "C:\\path\\to\\ml-32m" --backend blockwise --block-size 1000 --min-item-ratings 10 --top-k 75
 """
 import os
 import io
 import zipfile
 import argparse
+import json
 import pickle
+import tempfile
 from typing import Tuple, Dict, List, Optional
 
 import numpy as np
@@ -22,6 +25,28 @@ import pandas as pd
 from scipy.sparse import csr_matrix
 from sklearn.metrics.pairwise import cosine_similarity
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:  # Optional: fall back to the per-row NumPy top-K loop
+    _NUMBA_AVAILABLE = False
+try:
+    import similaripy
+except ImportError:  # Optional: the built-in blockwise similarity builder is used instead
+    similaripy = None
+try:
+    from joblib import Parallel, delayed, effective_n_jobs
+except ImportError:  # Optional: similarity blocks are then processed in this process only
+    Parallel = None
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:  # Optional: pandas' own CSV parser is used instead
+    pa = None
+    pacsv = None
 
 
 # ------------------ Loader ------------------
@@ -31,6 +56,11 @@ MOVIELENS_URLS = {
     "ml-latest": "https://files.grouplens.org/datasets/movielens/ml-latest.zip",
 }
 
+# Retries transient GroupLens errors with backoff instead of failing the whole build.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=5, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504))))
+
 
 def download_movielens(dataset: str = "ml-latest-small", dest_dir: Optional[str] = None) -> str:
     dest_dir = dest_dir or os.path.join(os.path.dirname(__file__), "data")
@@ -38,7 +68,7 @@ def download_movielens(dataset: str = "ml-latest-small", dest_dir: Optional[str]
     url = MOVIELENS_URLS.get(dataset)
     if not url:
         raise ValueError(f"Unknown dataset '{dataset}'")
-    resp = requests.get(url, timeout=60)
+    resp = _session.get(url, timeout=60)
     resp.raise_for_status()
     with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
         zf.extractall(dest_dir)
@@ -53,8 +83,21 @@ def download_movielens(dataset: str = "ml-latest-small", dest_dir: Optional[str]
     return extracted
 
 
+# Narrow dtypes keep ratings.csv (tens of millions of rows on ml-32m) at half the int64/float64 footprint.
+RATINGS_DTYPES = {"userId": "int32", "movieId": "int32", "rating": "float32", "timestamp": "int64"}
+
+
+def _read_ratings_csv(csv_path: str) -> pd.DataFrame:
+    if pacsv is not None:
+        # Arrow's reader parses on all cores; typed columns avoid inference passes
+        table = pacsv.read_csv(csv_path, convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.type_for_alias(dtype) for name, dtype in RATINGS_DTYPES.items()}))
+        return table.to_pandas()
+    return pd.read_csv(csv_path, dtype=RATINGS_DTYPES)
+
+
 def load_movielens(path: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    ratings = pd.read_csv(os.path.join(path, "ratings.csv"))
+    ratings = _read_ratings_csv(os.path.join(path, "ratings.csv"))
     movies = pd.read_csv(os.path.join(path, "movies.csv"))
     links = pd.read_csv(os.path.join(path, "links.csv"))
     return ratings, movies, links
@@ -72,59 +115,298 @@ def build_tmdb_mapping(links: pd.DataFrame) -> Tuple[Dict[int, int], Dict[int, i
 # ------------------ CF Model ------------------
 
 def build_item_user_matrix(ratings: pd.DataFrame) -> Tuple[csr_matrix, Dict[int, int], Dict[int, int]]:
-    unique_users = ratings['userId'].unique()
-    unique_items = ratings['movieId'].unique()
-    user_index = {uid: i for i, uid in enumerate(unique_users)}
-    item_index = {mid: i for i, mid in enumerate(unique_items)}
-    rows = ratings['movieId'].map(item_index).values
-    cols = ratings['userId'].map(user_index).values
-    data = ratings['rating'].astype(float).values
+    # factorize assigns codes in first-seen order (same as unique()) without a per-row dict lookup
+    rows, unique_items = pd.factorize(ratings['movieId'], sort=False)
+    cols, unique_users = pd.factorize(ratings['userId'], sort=False)
+    user_index = dict(zip(unique_users.tolist(), range(len(unique_users))))
+    item_index = dict(zip(unique_items.tolist(), range(len(unique_items))))
+    rows = rows.astype(np.int32, copy=False)
+    cols = cols.astype(np.int32, copy=False)
+    data = ratings['rating'].to_numpy(dtype=np.float32)
     mat = csr_matrix((data, (rows, cols)), shape=(len(unique_items), len(unique_users)), dtype=np.float32)
     return mat, item_index, user_index
 
 
-def compute_item_similarities_blockwise(item_user: csr_matrix, top_k: int = 50, block_size: int = 500) -> Tuple[np.ndarray, np.ndarray]:
+def bm25_weight(item_user: csr_matrix, k1: float = 1.2, b: float = 0.75) -> csr_matrix:
+    """Okapi BM25 re-weighting of an item-user rating matrix.
+
+    Ratings from very active users are damped (IDF over items) and heavily rated
+    items are length-normalised, so cosine neighbours lean on informative co-ratings.
+    """
+    coo = item_user.tocoo()
     n_items = item_user.shape[0]
-    norms = np.sqrt(item_user.multiply(item_user).sum(axis=1)).A1 + 1e-10
-    top_indices = np.zeros((n_items, top_k), dtype=np.int32)
-    top_scores = np.zeros((n_items, top_k), dtype=np.float32)
-    item_user_T = item_user.T
-    for start in range(0, n_items, block_size):
-        end = min(start + block_size, n_items)
-        block = item_user[start:end]
-        dots = block * item_user_T
-        for local_row in range(dots.shape[0]):
-            global_row = start + local_row
-            row = dots.getrow(local_row)
-            idx = row.indices
-            vals = row.data.astype(np.float32)
-            denom = norms[global_row] * norms[idx]
-            sims = vals / denom
-            mask = idx != global_row
-            idx = idx[mask]
-            sims = sims[mask]
-            if sims.size == 0:
+    user_counts = np.bincount(coo.col, minlength=item_user.shape[1])
+    idf = np.log(n_items) - np.log1p(user_counts)
+    row_sums = np.asarray(item_user.sum(axis=1)).ravel()
+    length_norm = (1.0 - b) + b * row_sums / max(row_sums.mean(), 1e-10)
+    data = coo.data * (k1 + 1.0) / (k1 * length_norm[coo.row] + coo.data) * idf[coo.col]
+    return csr_matrix((data.astype(np.float32), (coo.row, coo.col)), shape=item_user.shape)
+
+
+def _block_top_k_numpy(dots: csr_matrix, inv_norms: np.ndarray, start: int, top_k: int,
+                       top_indices: np.ndarray, top_scores: np.ndarray, min_sim: float = 0.0) -> None:
+    """Write the top-K cosine neighbours of each row in ``dots`` (rows start at ``start``).
+
+    Neighbours scoring below ``min_sim`` are dropped before ranking.
+    """
+    for local_row in range(dots.shape[0]):
+        global_row = start + local_row
+        row = dots.getrow(local_row)
+        idx = row.indices
+        vals = row.data.astype(np.float32)
+        sims = vals * (inv_norms[global_row] * inv_norms[idx])
+        mask = (idx != global_row) & (sims >= min_sim)
+        idx = idx[mask]
+        sims = sims[mask]
+        if sims.size == 0:
+            continue
+        # Select/sort ascending and read from the end, avoiding a negated copy of sims
+        if sims.size <= top_k:
+            order = np.argsort(sims)[::-1]
+        else:
+            part = np.argpartition(sims, -top_k)[-top_k:]
+            order = part[np.argsort(sims[part])[::-1]]
+        k = min(top_k, order.size)
+        top_indices[global_row, :k] = idx[order][:k]
+        top_scores[global_row, :k] = sims[order][:k]
+
+
+# Without Numba, blocks whose similarity product is this dense (and small enough to
+# materialize) are ranked with one vectorized argpartition instead of a per-row loop
+DENSE_BLOCK_MIN_DENSITY = 0.25
+DENSE_BLOCK_MAX_CELLS = 1 << 25
+
+
+def _block_top_k_dense(dots: csr_matrix, inv_norms: np.ndarray, start: int, top_k: int,
+                       top_indices: np.ndarray, top_scores: np.ndarray, min_sim: float = 0.0) -> None:
+    """Vectorized equivalent of _block_top_k_numpy for dense-ish blocks."""
+    n_rows, n_items = dots.shape
+    end = start + n_rows
+    sims = dots.toarray().astype(np.float32, copy=False)
+    sims *= inv_norms[start:end, None]
+    sims *= inv_norms[None, :]
+    # Only stored (non-zero) products at or above min_sim are candidates; the item itself never is
+    sims[(sims == 0) | (sims < min_sim)] = -np.inf
+    sims[np.arange(n_rows), np.arange(start, end)] = -np.inf
+    k = min(top_k, n_items)
+    part = np.argpartition(sims, n_items - k, axis=1)[:, n_items - k:]
+    part_scores = np.take_along_axis(sims, part, axis=1)
+    order = np.argsort(part_scores, axis=1)[:, ::-1]
+    idx = np.take_along_axis(part, order, axis=1)
+    scores = np.take_along_axis(part_scores, order, axis=1)
+    valid = np.isfinite(scores)
+    top_indices[start:end, :k] = np.where(valid, idx, 0)
+    top_scores[start:end, :k] = np.where(valid, scores, 0.0)
+
+
+def _block_top_k_loop(indptr, indices, data, inv_norms, start, top_k, top_indices, top_scores, min_sim):
+    # Same contract as _block_top_k_numpy, but walks the CSR arrays directly and keeps
+    # a descending insertion buffer per row instead of allocating per-row temporaries
+    n_rows = indptr.shape[0] - 1
+    for local_row in prange(n_rows):
+        global_row = start + local_row
+        scale = inv_norms[global_row]
+        buf_scores = np.empty(top_k, dtype=np.float32)
+        buf_idx = np.empty(top_k, dtype=np.int32)
+        count = 0
+        for p in range(indptr[local_row], indptr[local_row + 1]):
+            j = indices[p]
+            if j == global_row:
                 continue
-            if sims.size <= top_k:
-                order = np.argsort(-sims)
+            sim = np.float32(data[p] * inv_norms[j] * scale)
+            if sim < min_sim:
+                continue
+            if count < top_k:
+                pos = count
+                count += 1
+            elif sim > buf_scores[top_k - 1]:
+                pos = top_k - 1
             else:
-                part = np.argpartition(-sims, top_k)[:top_k]
-                order = part[np.argsort(-sims[part])]
-            k = min(top_k, order.size)
-            top_indices[global_row, :k] = idx[order][:k]
-            top_scores[global_row, :k] = sims[order][:k]
+                continue
+            while pos > 0 and buf_scores[pos - 1] < sim:
+                buf_scores[pos] = buf_scores[pos - 1]
+                buf_idx[pos] = buf_idx[pos - 1]
+                pos -= 1
+            buf_scores[pos] = sim
+            buf_idx[pos] = j
+        for q in range(count):
+            top_indices[global_row, q] = buf_idx[q]
+            top_scores[global_row, q] = buf_scores[q]
+
+
+# Native-compiled kernel when Numba is installed (cached to disk after first compile)
+_block_top_k_jit = njit(parallel=True, fastmath=True, cache=True)(_block_top_k_loop) if _NUMBA_AVAILABLE else None
+
+
+def _similarity_blocks(item_user: csr_matrix, item_user_T: csr_matrix, inv_norms: np.ndarray,
+                       row_start: int, row_end: int, top_k: int, block_size: int,
+                       top_indices: np.ndarray, top_scores: np.ndarray, min_sim: float = 0.0) -> None:
+    """Fill the top-K rows in [row_start, row_end) one block at a time."""
+    # Workers receive np.memmap outputs; plain ndarray views keep the Numba kernel happy
+    top_indices = np.asarray(top_indices)
+    top_scores = np.asarray(top_scores)
+    for start in range(row_start, row_end, block_size):
+        end = min(start + block_size, row_end)
+        block = item_user[start:end]
+        dots = (block * item_user_T).tocsr()
+        if _block_top_k_jit is not None:
+            _block_top_k_jit(dots.indptr, dots.indices, dots.data, inv_norms, start, top_k, top_indices, top_scores, np.float32(min_sim))
+        elif dots.nnz >= DENSE_BLOCK_MIN_DENSITY * dots.shape[0] * dots.shape[1] and dots.shape[0] * dots.shape[1] <= DENSE_BLOCK_MAX_CELLS:
+            _block_top_k_dense(dots, inv_norms, start, top_k, top_indices, top_scores, min_sim)
+        else:
+            _block_top_k_numpy(dots, inv_norms, start, top_k, top_indices, top_scores, min_sim)
+
+
+# Row ranges handed out per worker when building in parallel: enough for load balancing
+# (dense popular items cluster together) without re-sending item_user for every block
+PARALLEL_CHUNKS_PER_WORKER = 4
+
+
+def compute_item_similarities_blockwise(item_user: csr_matrix, top_k: int = 50, block_size: int = 500,
+                                        n_jobs: int = 1, min_sim: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    n_items = item_user.shape[0]
+    norms = np.sqrt(np.asarray(item_user.power(2).sum(axis=1)).ravel()) + 1e-10
+    # Reciprocals once up front so every kernel scales with multiplies instead of divides
+    inv_norms = (1.0 / norms).astype(np.float32)
+    # Materialize the transpose as CSR once so every block product takes SciPy's CSR x CSR path
+    item_user_T = item_user.T.tocsr()
+    n_workers = effective_n_jobs(n_jobs) if Parallel is not None else 1
+    if n_workers <= 1 or n_items <= block_size:
+        top_indices = np.zeros((n_items, top_k), dtype=np.int32)
+        top_scores = np.zeros((n_items, top_k), dtype=np.float32)
+        _similarity_blocks(item_user, item_user_T, inv_norms, 0, n_items, top_k, block_size, top_indices, top_scores, min_sim)
+        return top_indices, top_scores
+
+    # Blocks write disjoint row slices, so worker processes fill file-backed shared
+    # outputs directly instead of pickling their results back
+    n_blocks = -(-n_items // block_size)
+    blocks_per_chunk = max(1, -(-n_blocks // (n_workers * PARALLEL_CHUNKS_PER_WORKER)))
+    chunk_rows = blocks_per_chunk * block_size
+    with tempfile.TemporaryDirectory(prefix='cf_build_') as tmp_dir:
+        shared_indices = np.memmap(os.path.join(tmp_dir, 'top_indices.dat'), dtype=np.int32, mode='w+', shape=(n_items, top_k))
+        shared_scores = np.memmap(os.path.join(tmp_dir, 'top_scores.dat'), dtype=np.float32, mode='w+', shape=(n_items, top_k))
+        Parallel(n_jobs=n_workers)(
+            delayed(_similarity_blocks)(
+                item_user, item_user_T, inv_norms, start, min(start + chunk_rows, n_items),
+                top_k, block_size, shared_indices, shared_scores, min_sim)
+            for start in range(0, n_items, chunk_rows)
+        )
+        top_indices = np.array(shared_indices)
+        top_scores = np.array(shared_scores)
+        # Release the mappings before the directory is removed (required on Windows)
+        del shared_indices, shared_scores
     return top_indices, top_scores
 
 
+def compute_item_similarities_similaripy(item_user: csr_matrix, top_k: int = 50, min_sim: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Item-item cosine top-K via similaripy's multi-threaded sparse KNN.
+
+    Returns the same (top_indices, top_scores) layout as
+    compute_item_similarities_blockwise.
+    """
+    n_items = item_user.shape[0]
+    # One extra neighbour because the item itself is usually among its own top-K
+    sim = similaripy.cosine(item_user, k=top_k + 1, verbose=False).tocoo()
+    keep = (sim.row != sim.col) & (sim.data > 0) & (sim.data >= min_sim)
+    rows, cols, vals = sim.row[keep], sim.col[keep], sim.data[keep].astype(np.float32)
+    # Group by row, best score first, then rank entries within each row
+    order = np.lexsort((-vals, rows))
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    rank = np.arange(rows.size) - np.searchsorted(rows, rows)
+    within = rank < top_k
+    top_indices = np.zeros((n_items, top_k), dtype=np.int32)
+    top_scores = np.zeros((n_items, top_k), dtype=np.float32)
+    top_indices[rows[within], rank[within]] = cols[within]
+    top_scores[rows[within], rank[within]] = vals[within]
+    return top_indices, top_scores
+
+
+# The model is stored as a directory next to the configured path (models/movielens_cf.pkl
+# -> models/movielens_cf/) holding .npy arrays that are memory-mapped on load, so
+# startup skips unpickling and gunicorn workers share the neighbour tables' pages.
+# A legacy single-file pickle at the configured path is still loaded if no directory exists.
+CF_MODEL_FORMAT_VERSION = 1
+
+
+def _similarity_model_dir(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return root if ext == '.pkl' else path
+
+
+def similarity_model_exists(path: str) -> bool:
+    model_dir = _similarity_model_dir(path)
+    return os.path.isfile(os.path.join(model_dir, 'meta.json')) or os.path.isfile(path)
+
+
 def save_similarity_model(path: str, payload: dict):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'wb') as f:
-        pickle.dump(payload, f)
+    model_dir = _similarity_model_dir(path)
+    os.makedirs(model_dir, exist_ok=True)
+    index_to_movie = payload['index_to_movieId']
+    user_index = payload['user_index']
+    user_ids = [None] * len(user_index)
+    for uid, idx in user_index.items():
+        user_ids[idx] = uid
+    # One sorted pair array per direction, taken from build_tmdb_mapping's dicts so
+    # a tmdbId shared by several movieIds keeps its last-wins movieId
+    link_movie_ids, link_tmdb_ids = _sorted_dict_pairs(payload['movieId_to_tmdbId'])
+    tmdb_link_ids, tmdb_link_movie_ids = _sorted_dict_pairs(payload['tmdbId_to_movieId'])
+    arrays = {
+        'top_indices': np.ascontiguousarray(payload['top_indices']),
+        'top_scores': np.ascontiguousarray(payload['top_scores']),
+        'index_to_movieId': np.asarray(index_to_movie, dtype=np.int32),
+        'user_ids': np.asarray(user_ids, dtype=np.int32),
+        # Link pairs sorted by movieId, and by tmdbId (deduplicated) for the reverse lookup
+        'link_movie_ids': link_movie_ids,
+        'link_tmdb_ids': link_tmdb_ids,
+        'tmdb_link_ids': tmdb_link_ids,
+        'tmdb_link_movie_ids': tmdb_link_movie_ids,
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(model_dir, f'{name}.npy'), arr)
+    # meta.json is written last so a half-written model directory is never picked up
+    with open(os.path.join(model_dir, 'meta.json'), 'w') as f:
+        json.dump({'format': CF_MODEL_FORMAT_VERSION, 'top_k': int(arrays['top_indices'].shape[1])}, f)
+
+
+def _sorted_dict_pairs(mapping: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    keys = np.fromiter(mapping.keys(), dtype=np.int32, count=len(mapping))
+    values = np.fromiter(mapping.values(), dtype=np.int32, count=len(mapping))
+    order = np.argsort(keys)
+    return keys[order], values[order]
+
+
+def _lookup_sorted(sorted_keys: np.ndarray, values: np.ndarray, keys) -> np.ndarray:
+    """Vectorized dict.get over a sorted key array; misses come back as 0."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if sorted_keys.size == 0:
+        return np.zeros(keys.shape, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(sorted_keys, keys), sorted_keys.size - 1)
+    return np.where(sorted_keys[pos] == keys, values[pos], 0)
 
 
 def load_similarity_model(path: str):
-    with open(path, 'rb') as f:
-        return pickle.load(f)
+    model_dir = _similarity_model_dir(path)
+    if not os.path.isfile(os.path.join(model_dir, 'meta.json')):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def load(name, mmap=False):
+        return np.load(os.path.join(model_dir, f'{name}.npy'), mmap_mode='r' if mmap else None)
+
+    index_to_movie = load('index_to_movieId')
+    user_ids = load('user_ids')
+    return {
+        'item_index': {mid: i for i, mid in enumerate(index_to_movie.tolist())},
+        'user_index': {uid: i for i, uid in enumerate(user_ids.tolist())},
+        'top_indices': load('top_indices', mmap=True),
+        'top_scores': load('top_scores', mmap=True),
+        'index_to_movieId': index_to_movie,
+        # Aligned sorted arrays replace the movieId<->tmdbId dicts of legacy pickles
+        'movieId_sorted': load('link_movie_ids'),
+        'tmdbId_by_movieId': load('link_tmdb_ids'),
+        'tmdbId_sorted': load('tmdb_link_ids'),
+        'movieId_by_tmdbId': load('tmdb_link_movie_ids'),
+    }
 
 
 def build_and_save_cf_model(
@@ -134,7 +416,22 @@ def build_and_save_cf_model(
     top_k: int = 50,
     min_item_ratings: int = 5,
     block_size: int = 500,
+    n_jobs: int = 1,
+    bm25: bool = False,
+    min_sim: float = 0.0,
+    backend: str = "auto",
 ) -> Optional[str]:
+    """Build and save the item-item CF model.
+
+    ``backend`` is "similaripy", "blockwise", or "auto" (similaripy when it is
+    installed). ``block_size`` and ``n_jobs`` only apply to the blockwise backend.
+    """
+    if backend == "auto":
+        backend = "similaripy" if similaripy is not None else "blockwise"
+    if backend not in ("similaripy", "blockwise"):
+        raise ValueError(f"Unknown similarity backend: {backend}")
+    if backend == "similaripy" and similaripy is None:
+        raise ImportError("similaripy is not installed; use backend='blockwise'")
     movie_to_tmdb, tmdb_to_movie = build_tmdb_mapping(links)
     valid = ratings[ratings['movieId'].isin(movie_to_tmdb.keys())].copy()
     if min_item_ratings > 1:
@@ -145,7 +442,16 @@ def build_and_save_cf_model(
     if valid.empty:
         return None
     item_user, item_index, user_index = build_item_user_matrix(valid)
-    top_indices, top_scores = compute_item_similarities_blockwise(item_user, top_k=top_k, block_size=block_size)
+    if bm25:
+        item_user = bm25_weight(item_user)
+    print(f"Computing item similarities with the {backend} backend")
+    if backend == "similaripy":
+        if block_size != 500 or n_jobs != 1:
+            print("Note: --block-size/--n-jobs only apply to the blockwise backend and are ignored")
+        top_indices, top_scores = compute_item_similarities_similaripy(item_user, top_k=top_k, min_sim=min_sim)
+    else:
+        top_indices, top_scores = compute_item_similarities_blockwise(
+            item_user, top_k=top_k, block_size=block_size, n_jobs=n_jobs, min_sim=min_sim)
     index_to_movie = [None] * len(item_index)
     for mid, idx in item_index.items():
         index_to_movie[idx] = mid
@@ -166,20 +472,27 @@ def recommend_similar_by_movieId(movie_id: int, model, index_to_movieId: List[in
     if movie_id not in item_index:
         return []
     idx = item_index[movie_id]
-    neighbors = model['top_indices'][idx]
-    scores = model['top_scores'][idx]
-    order = np.argsort(-scores)
-    recs = []
-    for j in order:
-        mid = index_to_movieId[neighbors[j]]
-        if mid != movie_id and scores[j] > 0:
-            recs.append(mid)
-        if len(recs) >= top_n:
-            break
-    return recs
+    # Every builder path stores neighbour rows best-first, so no re-sort is needed
+    neighbors = np.asarray(model['top_indices'][idx])
+    scores = np.asarray(model['top_scores'][idx])
+    neighbors = neighbors[scores > 0]
+    if isinstance(index_to_movieId, np.ndarray):
+        mids = index_to_movieId[neighbors]
+    else:  # legacy pickled models keep a plain list
+        mids = np.fromiter((index_to_movieId[j] for j in neighbors), dtype=np.int64, count=neighbors.size)
+    return mids[mids != movie_id][:top_n].tolist()
 
 
 def recommend_similar_by_tmdbId(tmdb_id: int, model, top_n: int = 12) -> List[int]:
+    if 'tmdbId_sorted' in model:
+        index_to_movie = model['index_to_movieId']
+        ml_movie_id = int(_lookup_sorted(model['tmdbId_sorted'], model['movieId_by_tmdbId'], tmdb_id))
+        if not ml_movie_id:
+            return []
+        rec_ml_ids = recommend_similar_by_movieId(ml_movie_id, model, index_to_movie, top_n=top_n*2)
+        tmdb_recs = _lookup_sorted(model['movieId_sorted'], model['tmdbId_by_movieId'], rec_ml_ids)
+        return tmdb_recs[tmdb_recs != 0][:top_n].tolist()
+    # Legacy pickled models carry plain dicts
     tmdb_to_movie = model.get('tmdbId_to_movieId', {})
     movie_to_tmdb = model.get('movieId_to_tmdbId', {})
     index_to_movie = model.get('index_to_movieId')
@@ -203,13 +516,6 @@ import re
 TAG_TOKEN_RE = re.compile(r"[^a-z0-9]+")
 
 
-def _normalize_tag(tag: str) -> str:
-    t = tag.strip().lower()
-    t = TAG_TOKEN_RE.sub(" ", t)
-    t = " ".join(t.split())
-    return t
-
-
 def load_tags_enrichment(dataset_path: str, min_tag_freq: int = 5, max_tags_per_movie: int = 20) -> Dict[int, List[str]]:
     tags_fp = os.path.join(dataset_path, "tags.csv")
     links_fp = os.path.join(dataset_path, "links.csv")
@@ -220,17 +526,16 @@ def load_tags_enrichment(dataset_path: str, min_tag_freq: int = 5, max_tags_per_
     links = links.dropna(subset=["tmdbId"])[["movieId", "tmdbId"]].copy()
     links["tmdbId"] = links["tmdbId"].astype(int)
     tags = tags[["movieId", "tag"]].dropna()
-    tags["tag"] = tags["tag"].astype(str).map(_normalize_tag)
+    # Lowercase, then collapse runs of non-alphanumerics (whitespace included) into one space
+    tags["tag"] = tags["tag"].astype(str).str.lower().str.replace(TAG_TOKEN_RE.pattern, " ", regex=True).str.strip()
     tags = tags[tags["tag"] != ""]
     merged = tags.merge(links, on="movieId", how="inner")
     counts = merged.groupby(["tmdbId", "tag"]).size().reset_index(name="count")
     counts = counts[counts["count"] >= min_tag_freq]
     counts.sort_values(["tmdbId", "count"], ascending=[True, False], inplace=True)
     top = counts.groupby("tmdbId").head(max_tags_per_movie)
-    result: Dict[int, List[str]] = {}
-    for tmdb_id, group in top.groupby("tmdbId"):
-        result[int(tmdb_id)] = group["tag"].tolist()
-    return result
+    grouped = top.groupby("tmdbId", sort=False)["tag"].agg(list)
+    return {int(tmdb_id): tag_list for tmdb_id, tag_list in grouped.items()}
 
 
 # ------------------ CLI ------------------
@@ -244,6 +549,11 @@ def _parse_args():
     b.add_argument("--top-k", type=int, default=50)
     b.add_argument("--min-item-ratings", type=int, default=5)
     b.add_argument("--block-size", type=int, default=500)
+    b.add_argument("--n-jobs", type=int, default=1, help="Worker processes for the similarity build (-1 = all cores)")
+    b.add_argument("--bm25", action="store_true", help="BM25-weight ratings before computing cosine similarities")
+    b.add_argument("--min-sim", type=float, default=0.0, help="Drop neighbours below this similarity (e.g. 0.01)")
+    b.add_argument("--backend", choices=("auto", "similaripy", "blockwise"), default="auto",
+                   help="Similarity backend; auto uses similaripy when installed")
     return p.parse_args()
 
 
@@ -259,8 +569,12 @@ def _main():
             top_k=args.top_k,
             min_item_ratings=args.min_item_ratings,
             block_size=args.block_size,
+            n_jobs=args.n_jobs,
+            bm25=args.bm25,
+            min_sim=args.min_sim,
+            backend=args.backend,
         )
-        if model_path and os.path.exists(model_path):
+        if model_path and similarity_model_exists(model_path):
             print(f"✅ CF model saved: {model_path}")
         else:
             print("❌ Failed to build CF model")
@@ -3,6 +3,7 @@ import argparse
 import os
 from movielens_loader import download_movielens, load_movielens
 from movielens_cf import build_and_save_cf_model, load_similarity_model, recommend_similar_by_tmdbId
+from movielens import similarity_model_exists
 from tmdb_service import TMDbService
 
 
@@ -21,7 +22,7 @@ def main():
     args = parse_args()
     print("== CF Smoke Test ==")
 
-    if args.reuse and os.path.exists(args.model_path):
+    if args.reuse and similarity_model_exists(args.model_path):
         print(f"Loading existing model at {args.model_path}")
     else:
         if args.dataset_path:
@@ -38,7 +39,7 @@ def main():
             use_blockwise=args.blockwise,
             block_size=args.block_size,
         )
-        if not model_path or not os.path.exists(model_path):
+        if not model_path or not similarity_model_exists(model_path):
             print("Failed to build CF model")
             return
         print(f"Model saved to {model_path}")
@@ -53,11 +54,9 @@ def main():
     tmdb_id = search[0]['id']
     neighbors = recommend_similar_by_tmdbId(tmdb_id, model, top_n=10)
     print(f"CF neighbors (tmdb ids) for {anchor_title}: {neighbors}")
-    detailed = []
-    for nid in neighbors[:5]:
-        d = TMDbService.get_movie_details(nid)
-        if d:
-            detailed.append(d.get('title'))
+    # Fetched concurrently; the bulk helper returns {tmdb_id: details or None}
+    details_by_id = TMDbService.get_movie_details_bulk(neighbors[:5])
+    detailed = [details_by_id[nid].get('title') for nid in neighbors[:5] if details_by_id.get(nid)]
     print("Sample neighbor titles:", detailed)
 
 
@@ -2,9 +2,15 @@
 Test user preference learning system
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from user_preference import user_engine
 from tmdb_service import TMDbService
 
+def first_search_result(movie_name):
+    """Top TMDb search hit for a title, or None"""
+    results = TMDbService.search_movies(movie_name, page=1)
+    return results[0] if results else None
+
 def test_user_preferences():
     """Test the user preference system"""
     
@@ -29,24 +35,27 @@ def test_user_preferences():
         ("Blade Runner", 4)
     ]
     
-    for movie_name, rating in movies_to_rate:
-        results = TMDbService.search_movies(movie_name, page=1)
-        if results:
-            movie = results[0]
+    # TMDb lookups run concurrently; profile writes stay serial
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        rated_hits = list(pool.map(first_search_result, [name for name, _ in movies_to_rate]))
+    details_by_id = TMDbService.get_movie_details_bulk([m['id'] for m in rated_hits if m])
+    
+    for (movie_name, rating), movie in zip(movies_to_rate, rated_hits):
+        if movie:
             movie_id = movie['id']
-            movie_details = TMDbService.get_movie_details(movie_id)
-            
-            user_engine.track_rating(test_user, movie_id, rating, movie_details)
+            user_engine.track_rating(test_user, movie_id, rating, details_by_id.get(movie_id))
             print(f"   ⭐ Rated '{movie_name}': {rating}/5")
     
     # Test 3: Add to watchlist
     print("\n3. Building watchlist...")
     watchlist_movies = ["Dune", "The Prestige", "Tenet"]
     
-    for movie_name in watchlist_movies:
-        results = TMDbService.search_movies(movie_name, page=1)
-        if results:
-            movie_id = results[0]['id']
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        watchlist_hits = list(pool.map(first_search_result, watchlist_movies))
+    
+    for movie_name, movie in zip(watchlist_movies, watchlist_hits):
+        if movie:
+            movie_id = movie['id']
             user_engine.add_to_watchlist(test_user, movie_id)
             print(f"   📋 Added '{movie_name}' to watchlist")
     
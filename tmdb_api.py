@@ -31,16 +31,14 @@ def get_movie_genres(movie_id: int):
 
 
 def get_similar_movies(movie_id: int, count: int = 5):
-    sims = TMDbService.get_similar_movies(movie_id, page=1) or []
-    results = []
-    for movie in sims[:count]:
-        results.append({
-            "id": movie.get("id"),
-            "title": movie.get("title"),
-            "overview": movie.get("overview", ""),
-            "poster_path": TMDbService.format_poster_url(movie.get("poster_path")),
-            "genres": [],
-            "rating": movie.get("vote_average", 0),
-            "release_date": movie.get("release_date", ""),
-        })
-    return results
+    sims = (TMDbService.get_similar_movies(movie_id, page=1) or [])[:count]
+    posters = TMDbService.format_poster_urls([movie.get("poster_path") for movie in sims])
+    return [{
+        "id": movie.get("id"),
+        "title": movie.get("title"),
+        "overview": movie.get("overview", ""),
+        "poster_path": poster,
+        "genres": [],
+        "rating": movie.get("vote_average", 0),
+        "release_date": movie.get("release_date", ""),
+    } for movie, poster in zip(sims, posters)]
@@ -9,12 +9,37 @@ Do NOT hardcode API keys. Use a .env file or environment variables.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import copy
+import json
 import time
+import random
 import logging
-from threading import RLock
+import functools
+from collections import OrderedDict
+import threading
+from threading import RLock, Thread
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Callable, Optional
+
+try:
+    import diskcache
+except ImportError:  # Optional: persistent cache is skipped when not installed
+    diskcache = None
+try:
+    import redis
+except ImportError:  # Optional: shared cache tier is skipped when not installed
+    redis = None
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON parsing; falls back to the stdlib json module
+    orjson = None
+try:
+    import httpx
+except ImportError:  # Optional: HTTP/2 TMDb client (TMDB_HTTP2=true); requests is used otherwise
+    httpx = None
 
 # Load environment variables
 load_dotenv()
@@ -22,12 +47,146 @@ load_dotenv()
 API_KEY = os.getenv("TMDB_API_KEY")
 BASE_URL = "https://api.themoviedb.org/3"
 IMAGE_URL = "https://image.tmdb.org/t/p/w500"
+NO_IMAGE_URL = "/static/no_image.svg"
+
+# Shared keep-alive connection pool; sized for the concurrent fan-out helpers.
+# Raise TMDB_POOL_SIZE when running more worker threads per process.
+# Adapter-level retries stay off: _get_json owns retry/backoff so cache hits never
+# pay for them and attempts are not multiplied.
+TMDB_POOL_SIZE = int(os.getenv("TMDB_POOL_SIZE", "32"))
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=TMDB_POOL_SIZE, max_retries=0))
 
-# Simple in-process TTL cache for TMDb JSON responses
-_cache = {}
+# Opt-in HTTP/2 client: concurrent fan-out requests multiplex as streams over a few
+# TLS connections instead of one HTTP/1.1 connection each. Needs httpx[http2].
+_http = _session
+if httpx is not None and os.getenv("TMDB_HTTP2", "false").lower() == "true":
+    try:
+        _http = httpx.Client(http2=True, limits=httpx.Limits(
+            max_connections=TMDB_POOL_SIZE, max_keepalive_connections=TMDB_POOL_SIZE))
+    except Exception as e:  # e.g. the h2 package is missing
+        logging.getLogger(__name__).warning(f"HTTP/2 TMDb client unavailable, using requests: {e}")
+
+# In-process TTL + LRU cache for TMDb JSON responses. The size cap keeps a
+# long-running server from accumulating every distinct search it has seen.
+TMDB_CACHE_MAXSIZE = int(os.getenv("TMDB_CACHE_MAXSIZE", "4096"))
+_CACHE_SWEEP_EVERY = 256  # inserts between sweeps of expired entries
+_cache = OrderedDict()
 _cache_lock = RLock()
+_cache_inserts = 0
+# 404s are remembered briefly so dead ids (e.g. MovieLens->TMDb mapping gaps) stop re-hitting the API
+TMDB_NEGATIVE_TTL = int(os.getenv("TMDB_NEGATIVE_TTL", "60"))
+# Fetches currently on the wire, keyed like _cache; concurrent misses wait on these
+_inflight = {}
+# Set by the cache warmer: _get_json then re-fetches (and re-caches) even fresh entries
+_refresh_state = threading.local()
 logger = logging.getLogger(__name__)
 
+# Optional on-disk cache shared across processes/restarts, as an L2 behind _cache.
+# Responses cached for at least TMDB_DISK_CACHE_MIN_TTL seconds are persisted;
+# short-lived ones (search, autocomplete, trending) churn too fast to be worth it.
+# Bump TMDB_CACHE_VERSION to invalidate all persisted entries.
+TMDB_CACHE_DIR = os.getenv("TMDB_CACHE_DIR", os.path.join(".cache", "tmdb"))
+TMDB_CACHE_VERSION = os.getenv("TMDB_CACHE_VERSION", "1")
+TMDB_DISK_CACHE_MIN_TTL = int(os.getenv("TMDB_DISK_CACHE_MIN_TTL", "1800"))
+TMDB_DISK_CACHE_SIZE_MB = int(os.getenv("TMDB_DISK_CACHE_SIZE_MB", "512"))
+_disk_cache = None
+if diskcache is not None and os.getenv("ENABLE_TMDB_DISK_CACHE", "true").lower() == "true":
+    try:
+        _disk_cache = diskcache.FanoutCache(TMDB_CACHE_DIR, shards=8, size_limit=TMDB_DISK_CACHE_SIZE_MB << 20)
+    except Exception as e:
+        logger.warning(f"TMDb disk cache unavailable: {e}")
+        _disk_cache = None
+
+
+# Optional shared Redis tier (set REDIS_URL) for memoized composite payloads
+REDIS_URL = os.getenv("REDIS_URL")
+_redis = None
+if redis is not None and REDIS_URL:
+    try:
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5)
+    except Exception as e:
+        logger.warning(f"Redis cache unavailable: {e}")
+        _redis = None
+
+
+def _json_loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _json_dumps(value):
+    return orjson.dumps(value) if orjson is not None else json.dumps(value)
+
+
+class PartialResult:
+    """Wraps a degraded result from a tmdb_cache function (a sub-lookup failed).
+
+    The decorator unwraps it for the caller but caches the value only for its
+    ``partial_ttl``, so one transient TMDb error is not served for a full ``ttl``.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def tmdb_cache(prefix: str, key: Callable[..., Optional[str]], ttl: int = 86400, maxsize: int = 4096,
+               partial_ttl: int = 0):
+    """Memoize a function returning JSON-serializable data.
+
+    Tier 1 is an in-process TTL LRU; tier 2 is Redis when configured. ``key``
+    maps the call arguments to a cache key (return None to bypass caching).
+    Values returned wrapped in PartialResult are kept for ``partial_ttl``
+    seconds instead (0: not cached). Hits return a deep copy so callers may
+    mutate the result freely.
+    """
+    def decorator(fn):
+        local = OrderedDict()
+        lock = RLock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            if k is None:
+                return fn(*args, **kwargs)
+            full_key = f"v{TMDB_CACHE_VERSION}:{prefix}:{k}"
+            now = time.time()
+            with lock:
+                entry = local.get(full_key)
+                if entry and entry[0] > now:
+                    local.move_to_end(full_key)
+                    return copy.deepcopy(entry[1])
+            value = None
+            if _redis is not None:
+                try:
+                    raw = _redis.get(full_key)
+                    value = _json_loads(raw) if raw is not None else None
+                except Exception:
+                    value = None
+            entry_ttl = ttl
+            if value is None:
+                value = fn(*args, **kwargs)
+                if isinstance(value, PartialResult):
+                    value, entry_ttl = value.value, partial_ttl
+                    if entry_ttl <= 0:
+                        return value
+                if value is None:
+                    return None
+                if _redis is not None:
+                    try:
+                        _redis.setex(full_key, entry_ttl, _json_dumps(value))
+                    except Exception as e:
+                        logger.warning(f"Redis cache write failed {prefix}: {e}")
+            with lock:
+                local[full_key] = (now + entry_ttl, value)
+                local.move_to_end(full_key)
+                while len(local) > maxsize:
+                    local.popitem(last=False)
+            return copy.deepcopy(value)
+
+        return wrapper
+    return decorator
+
 
 def _cache_key(path: str, params: dict) -> str:
     # Exclude API key from cache key (it is constant per process)
@@ -35,301 +194,483 @@ def _cache_key(path: str, params: dict) -> str:
     return f"{path}|{items}"
 
 
-def _get_json(path: str, params: Optional[dict] = None, ttl: int = 600, retries: int = 3, timeout: int = 10):
+def _cache_put(key: str, data, expires_at: float, etag: Optional[str] = None) -> None:
+    global _cache_inserts
+    with _cache_lock:
+        _cache[key] = (expires_at, data, etag)
+        _cache.move_to_end(key)
+        _cache_inserts += 1
+        if _cache_inserts % _CACHE_SWEEP_EVERY == 0:
+            now = time.time()
+            # Expired entries with an ETag stay (LRU-bounded) for conditional revalidation
+            for stale in [k for k, (exp, _, tag) in list(_cache.items()) if exp <= now and not tag]:
+                del _cache[stale]
+        while len(_cache) > TMDB_CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+
+
+_RETRY_BASE_DELAY = 0.3
+_RETRY_MAX_DELAY = 5.0  # request threads never park longer than this per attempt
+_RETRY_JITTER = 0.2
+
+
+def _retry_after_seconds(resp) -> Optional[float]:
+    """Retry-After in seconds when sent as a number (TMDb's format); else None."""
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_json(path: str, params: Optional[dict] = None, ttl: int = 600, retries: int = 3, timeout: int = 10, persist: Optional[bool] = None,
+              cache_key: Optional[str] = None, use_cache: bool = True):
     """Fetch JSON from TMDb with TTL cache and retry/backoff.
 
-    Returns parsed JSON (dict) on 200; else None.
+    When diskcache is installed, responses are also kept in the on-disk cache so
+    they survive process restarts. ``persist=None`` persists responses whose
+    ``ttl`` is at least TMDB_DISK_CACHE_MIN_TTL for ``ttl`` seconds; ``True``
+    always persists, for a day (stable per-movie data); ``False`` never does.
+
+    Hot endpoints with a fixed parameter shape pass a prebuilt ``cache_key`` so
+    hits skip the generic sorted-params key. ``use_cache=False`` always goes to
+    TMDb and neither reads nor fills any cache tier (no key build, no lock).
+
+    Returns parsed JSON (dict) on 200; else None. A 404 is cached as None for
+    TMDB_NEGATIVE_TTL seconds.
     """
     if params is None:
         params = {}
-    params = {**params, "api_key": API_KEY}
-    key = _cache_key(path, params)
+    if not use_cache:
+        return _fetch_json(path, {**params, "api_key": API_KEY}, None, ttl, retries, timeout, 0, time.time())
+    key = cache_key or _cache_key(path, params)
 
     now = time.time()
+    # Lock-free hit path: a single dict read is atomic under the GIL, so concurrent
+    # readers never wait on _cache_lock just to return a fresh entry. The LRU bump
+    # mutates the ordering that _cache_put's sweep iterates, so it only happens when
+    # the lock is free; a contended hit skips it rather than block
+    refresh = getattr(_refresh_state, "active", False)
+    entry = _cache.get(key)
+    if entry and entry[0] > now and not refresh:
+        if _cache_lock.acquire(blocking=False):
+            try:
+                if key in _cache:
+                    _cache.move_to_end(key)
+            finally:
+                _cache_lock.release()
+        return entry[1]
     with _cache_lock:
+        # Re-check under the lock: another thread may have just filled it
         entry = _cache.get(key)
-        if entry and entry[0] > now:
+        if entry and entry[0] > now and not refresh:
             return entry[1]
+        # An expired body with an ETag can be revalidated instead of re-downloaded
+        stale = entry if entry and entry[2] else None
+        # Coalesce concurrent misses: only the first caller goes to disk/TMDb
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        try:
+            return future.result(timeout=timeout * max(1, retries) + 5)
+        except Exception as e:
+            logger.warning(f"TMDb request failed waiting on in-flight {path}: {e}")
+            return None
+
+    if persist is None:
+        disk_ttl = ttl if ttl >= TMDB_DISK_CACHE_MIN_TTL else 0
+    else:
+        disk_ttl = 86400 if persist else 0
+    try:
+        data = _fetch_json(path, {**params, "api_key": API_KEY}, key, ttl, retries, timeout, disk_ttl, now, stale)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(data)
+        return data
+    finally:
+        with _cache_lock:
+            _inflight.pop(key, None)
+
+
+def _fetch_json(path: str, params: dict, key: Optional[str], ttl: int, retries: int, timeout: int, disk_ttl: int, now: float,
+                stale: Optional[tuple] = None):
+    """Disk-cache lookup then HTTP fetch for a _get_json miss; fills the caches on success.
+
+    ``stale`` is an expired (expiry, data, etag) entry; its ETag is sent as
+    If-None-Match and a 304 renews it without transferring the body. A ``key`` of
+    None fetches without touching the caches.
+    """
+    persist = key is not None and disk_ttl > 0 and _disk_cache is not None
+    disk_key = f"v{TMDB_CACHE_VERSION}:{key}" if persist else None
+    if persist:
+        try:
+            data = _disk_cache.get(disk_key)
+            # Raw response bytes; entries written before that change are pickled dicts
+            if isinstance(data, (bytes, str)):
+                data = _json_loads(data)
+        except Exception:
+            data = None
+        if data is not None:
+            _cache_put(key, data, now + ttl)
+            return data
 
     url = f"{BASE_URL}{path}"
-    backoffs = [0.3, 0.6, 1.2]
+    headers = {"If-None-Match": stale[2]} if stale else None
     attempts = max(1, retries)
     last_err = None
     for i in range(attempts):
+        retry_after = None
         try:
-            resp = requests.get(url, params=params, timeout=timeout)
+            resp = _http.get(url, params=params, timeout=timeout, headers=headers)
+            if resp.status_code == 304 and stale:
+                _cache_put(key, stale[1], now + ttl, stale[2])
+                return stale[1]
             if resp.status_code == 200:
-                data = resp.json()
-                with _cache_lock:
-                    _cache[key] = (now + ttl, data)
+                data = _json_loads(resp.content)
+                if key is not None:
+                    _cache_put(key, data, now + ttl, resp.headers.get("ETag"))
+                if persist:
+                    try:
+                        _disk_cache.set(disk_key, resp.content, expire=disk_ttl)
+                    except Exception as e:
+                        logger.warning(f"TMDb disk cache write failed {path}: {e}")
                 return data
             # Handle rate limit or transient server errors
             if resp.status_code in (429, 500, 502, 503, 504):
                 last_err = f"HTTP {resp.status_code}"
+                retry_after = _retry_after_seconds(resp)
             else:
+                if resp.status_code == 404 and key is not None:
+                    _cache_put(key, None, now + TMDB_NEGATIVE_TTL)
                 logger.warning(f"TMDb request failed {path}: HTTP {resp.status_code}")
                 return None
         except Exception as e:
             last_err = str(e)
-        # Backoff before next attempt
+        # Backoff before next attempt: the server's Retry-After when given, else
+        # exponential; jitter keeps threads throttled together from retrying in lockstep
         if i < attempts - 1:
-            time.sleep(backoffs[min(i, len(backoffs)-1)])
+            delay = retry_after if retry_after is not None else _RETRY_BASE_DELAY * (2 ** i)
+            time.sleep(min(delay, _RETRY_MAX_DELAY) + random.uniform(0, _RETRY_JITTER))
     logger.warning(f"TMDb request failed after retries {path}: {last_err}")
     return None
 
+_TRAILER_TYPES = frozenset(("Trailer", "Teaser"))
+
+
+def _search_cache_key(query: str, page) -> str:
+    # Shared by search_movies and autocomplete_search (same /search/movie params)
+    return f"/search/movie|{query}|{page}|en-US"
+
+
+def _safe_tmdb_call(error_message: str, default: Optional[Callable] = None):
+    """Return ``default()`` (or None) and log instead of raising from a TMDbService call."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"{error_message}: {e}")
+                return default() if default is not None else None
+        return wrapper
+    return decorator
+
+
+def _normalize_query(query) -> str:
+    # TMDb search is case-insensitive; normalising lets variants share a cache entry
+    return " ".join((query or "").lower().split())
+
+
+def _warm_hot_lists():
+    """Re-fetch the lists the homepage renders first, replacing their cache entries."""
+    _refresh_state.active = True
+    try:
+        for window in ("day", "week"):
+            TMDbService.get_trending_movies(window)
+        for page in (1, 2, 3):
+            TMDbService.get_popular_movies(page=page)
+        TMDbService.get_now_playing_movies(page=1)
+    finally:
+        _refresh_state.active = False
+
+
+def start_cache_warmer(interval: int = 570) -> Thread:
+    """Start a daemon thread that refreshes the hot TMDb lists every ``interval`` seconds.
+
+    The default sits just under the shortest of their TTLs (600s).
+    """
+    def loop():
+        while True:
+            try:
+                _warm_hot_lists()
+            except Exception as e:
+                logger.warning(f"TMDb cache warm-up failed: {e}")
+            time.sleep(interval)
+
+    thread = Thread(target=loop, name="tmdb-cache-warmer", daemon=True)
+    thread.start()
+    return thread
+
+
+def _fan_out(fn, movie_ids, max_workers: int = 8) -> dict:
+    """Call ``fn(movie_id)`` concurrently for unique, non-empty ids; returns {id: result}."""
+    ids = list(dict.fromkeys(mid for mid in movie_ids if mid))
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ids))) as ex:
+        return dict(zip(ids, ex.map(fn, ids)))
+
+
 class TMDbService:
     """Service class for interacting with The Movie Database API"""
     
     @staticmethod
+    @_safe_tmdb_call("Error searching movies", default=list)
     def search_movies(query, page=1):
         """Search for movies by title"""
-        try:
-            data = _get_json(
-                "/search/movie",
-                {"query": query, "language": "en-US", "page": page},
-                ttl=300,
-            )
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error searching movies: {e}")
-            return []
+        query = _normalize_query(query)
+        data = _get_json(
+            "/search/movie",
+            {"query": query, "language": "en-US", "page": page},
+            ttl=300,
+            cache_key=_search_cache_key(query, page),
+        )
+        return (data or {}).get("results", [])
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching movie details")
     def get_movie_details(movie_id):
         """Get detailed information about a specific movie"""
-        try:
-            return _get_json(f"/movie/{movie_id}", {"language": "en-US"}, ttl=3600)
-        except Exception as e:
-            logger.warning(f"Error fetching movie details: {e}")
-            return None
+        movie_id = int(movie_id)
+        return _get_json(f"/movie/{movie_id}", {"language": "en-US"}, ttl=3600, persist=True,
+                         cache_key=f"/movie/{movie_id}|en-US")
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching full movie details")
+    def get_movie_full(movie_id, append=("credits", "keywords")):
+        """Movie details with sub-resources folded in via append_to_response.
+
+        One request replaces details + credits + keywords; the appended parts come
+        back under their own keys (``credits``, ``keywords`` -> {"keywords": [...]}).
+        """
+        movie_id = int(movie_id)
+        append = ",".join(append)
+        data = _get_json(f"/movie/{movie_id}", {"language": "en-US", "append_to_response": append}, ttl=3600,
+                         persist=True, cache_key=f"/movie/{movie_id}|en-US|{append}")
+        if data:
+            # The response is a superset of get_movie_details, so seed that entry too
+            details_key = f"/movie/{movie_id}|en-US"
+            with _cache_lock:
+                seeded = details_key in _cache
+            if not seeded:
+                _cache_put(details_key, data, time.time() + 3600)
+        return data
+
+    @staticmethod
+    def get_movie_details_bulk(movie_ids, max_workers=8):
+        """Get details for many movies concurrently. Returns {movie_id: details or None}."""
+        return _fan_out(TMDbService.get_movie_details, movie_ids, max_workers=max_workers)
+
+    @staticmethod
+    @_safe_tmdb_call("Error fetching movie videos", default=list)
     def get_movie_videos(movie_id):
         """Get videos (trailers, teasers) for a specific movie"""
-        try:
-            data = _get_json(f"/movie/{movie_id}/videos", {"language": "en-US"}, ttl=3600)
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error fetching movie videos: {e}")
-            return []
+        data = _get_json(f"/movie/{movie_id}/videos", {"language": "en-US"}, ttl=3600)
+        return (data or {}).get("results", [])
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching similar movies", default=list)
     def get_similar_movies(movie_id, page=1):
         """Get movies similar to a specific movie"""
-        try:
-            data = _get_json(
-                f"/movie/{movie_id}/similar",
-                {"language": "en-US", "page": page},
-                ttl=1800,
-            )
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error fetching similar movies: {e}")
-            return []
+        data = _get_json(
+            f"/movie/{movie_id}/similar",
+            {"language": "en-US", "page": page},
+            ttl=1800,
+        )
+        return (data or {}).get("results", [])
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching movie credits")
     def get_movie_credits(movie_id):
         """Get cast and crew information for a movie"""
-        try:
-            return _get_json(f"/movie/{movie_id}/credits", {}, ttl=3600)
-        except Exception as e:
-            logger.warning(f"Error fetching movie credits: {e}")
-            return None
+        return _get_json(f"/movie/{int(movie_id)}/credits", {}, ttl=3600, persist=True)
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching movie keywords", default=list)
     def get_movie_keywords(movie_id):
         """Get keywords associated with a movie"""
-        try:
-            data = _get_json(f"/movie/{movie_id}/keywords", {}, ttl=7200)
-            return (data or {}).get("keywords", [])
-        except Exception as e:
-            logger.warning(f"Error fetching movie keywords: {e}")
-            return []
+        data = _get_json(f"/movie/{int(movie_id)}/keywords", {}, ttl=7200, persist=True)
+        return (data or {}).get("keywords", [])
     
     @staticmethod
-    def get_trending_movies(time_window="week"):
-        """Get trending movies (day or week)"""
-        try:
-            data = _get_json(f"/trending/movie/{time_window}", {}, ttl=600)
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error fetching trending movies: {e}")
-            return []
+    @_safe_tmdb_call("Error fetching trending movies", default=list)
+    def get_trending_movies(time_window="week", fresh=False):
+        """Get trending movies (day or week); ``fresh=True`` bypasses the cache."""
+        data = _get_json(f"/trending/movie/{time_window}", {}, ttl=600, use_cache=not fresh)
+        return (data or {}).get("results", [])
 
     @staticmethod
+    @_safe_tmdb_call("Error fetching now playing movies", default=list)
     def get_now_playing_movies(page=1):
         """Get currently playing (latest releases) movies."""
-        try:
-            data = _get_json("/movie/now_playing", {"language": "en-US", "page": page}, ttl=900)
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error fetching now playing movies: {e}")
-            return []
+        data = _get_json("/movie/now_playing", {"language": "en-US", "page": page}, ttl=900)
+        return (data or {}).get("results", [])
 
     @staticmethod
+    @_safe_tmdb_call("Error fetching latest movie")
     def get_latest_movie():
-        """Get the very latest added movie (single object). TMDb may return incomplete data sometimes."""
-        try:
-            data = _get_json("/movie/latest", {"language": "en-US"}, ttl=1800)
-            return data or None
-        except Exception as e:
-            logger.warning(f"Error fetching latest movie: {e}")
-            return None
+        """Get the very latest added movie (single object). TMDb may return incomplete data sometimes.
+
+        Always fetched fresh: the newest entry changes minutes apart, so caching it
+        only served stale results.
+        """
+        data = _get_json("/movie/latest", {"language": "en-US"}, use_cache=False)
+        return data or None
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching popular movies", default=list)
     def get_popular_movies(page=1):
         """Get popular movies"""
-        try:
-            data = _get_json("/movie/popular", {"language": "en-US", "page": page}, ttl=600)
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error fetching popular movies: {e}")
-            return []
+        data = _get_json("/movie/popular", {"language": "en-US", "page": page}, ttl=600)
+        return (data or {}).get("results", [])
     
     @staticmethod
     def format_poster_url(poster_path):
         """Format poster path to full URL"""
-        if poster_path:
-            return IMAGE_URL + poster_path
-        return "/static/no_image.svg"
+        return IMAGE_URL + poster_path if poster_path else NO_IMAGE_URL
+
+    @staticmethod
+    def format_poster_urls(poster_paths):
+        """Batch form of format_poster_url for result lists"""
+        base, missing = IMAGE_URL, NO_IMAGE_URL
+        return [base + path if path else missing for path in poster_paths]
     
     @staticmethod
     def get_youtube_trailer(movie_id):
         """Get YouTube trailer URL for a movie"""
         videos = TMDbService.get_movie_videos(movie_id)
-        
-        for video in videos:
-            if video.get("site") == "YouTube" and video.get("type") == "Trailer":
-                return f"https://www.youtube.com/watch?v={video['key']}"
-        
-        return None
+        candidates = [v for v in videos if v.get("site") == "YouTube" and v.get("type") in _TRAILER_TYPES and v.get("key")]
+        if not candidates:
+            return None
+        # Trailers before teasers, official uploads first, then highest resolution
+        best = min(candidates, key=lambda v: (v.get("type") != "Trailer", not v.get("official", False), -(v.get("size") or 0)))
+        return f"https://www.youtube.com/watch?v={best['key']}"
+
+    @staticmethod
+    def get_youtube_trailers_bulk(movie_ids, max_workers=8):
+        """Get YouTube trailer URLs for many movies concurrently. Returns {movie_id: url or None}."""
+        return _fan_out(TMDbService.get_youtube_trailer, movie_ids, max_workers=max_workers)
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching collection")
     def get_collection(collection_id):
         """Get all movies in a collection (franchise/series)"""
-        try:
-            return _get_json(f"/collection/{collection_id}", {"language": "en-US"}, ttl=7200)
-        except Exception as e:
-            logger.warning(f"Error fetching collection: {e}")
-            return None
+        # Collection membership rarely changes, so it is persisted alongside movie details
+        return _get_json(f"/collection/{int(collection_id)}", {"language": "en-US"}, ttl=7200, persist=True)
 
     @staticmethod
+    @_safe_tmdb_call("Error fetching watch providers", default=dict)
     def get_watch_providers(movie_id, region: str = "US"):
         """Get watch provider information for a movie for a given region.
 
         Returns a dict with keys like 'link', 'flatrate', 'rent', 'buy' when available.
         """
-        try:
-            data = _get_json(f"/movie/{movie_id}/watch/providers", {}, ttl=3600)
-            results = (data or {}).get("results", {})
-            region_code = (region or "US").upper()
-            info = results.get(region_code) or results.get("US") or {}
-            # Shape minimal response: preserve link and plan categories
-            out = {
-                "link": info.get("link"),
-            }
-            for key in ("flatrate", "rent", "buy", "free", "ads"):
-                if key in info and isinstance(info.get(key), list):
-                    out[key] = info.get(key)
-            return out
-        except Exception as e:
-            logger.warning(f"Error fetching watch providers: {e}")
-            return {}
+        data = _get_json(f"/movie/{movie_id}/watch/providers", {}, ttl=3600)
+        results = (data or {}).get("results", {})
+        region_code = (region or "US").upper()
+        info = results.get(region_code) or results.get("US") or {}
+        # Shape minimal response: preserve link and plan categories
+        out = {
+            "link": info.get("link"),
+        }
+        for key in ("flatrate", "rent", "buy", "free", "ads"):
+            if key in info and isinstance(info.get(key), list):
+                out[key] = info.get(key)
+        return out
     
     @staticmethod
+    @_safe_tmdb_call("Error in autocomplete search", default=list)
     def autocomplete_search(query, limit=5):
         """Quick search for autocomplete suggestions"""
-        try:
-            data = _get_json(
-                "/search/movie",
-                {"query": query, "language": "en-US", "page": 1},
-                ttl=120,
-                timeout=5,
-            )
-            results = (data or {}).get("results", [])
-            return [{
-                "id": movie.get("id"),
-                "title": movie.get("title"),
-                "year": movie.get("release_date", "")[:4] if movie.get("release_date") else "",
-                "poster": TMDbService.format_poster_url(movie.get("poster_path"))
-            } for movie in results[:limit]]
-        except Exception as e:
-            logger.warning(f"Error in autocomplete search: {e}")
-            return []
+        # Same normalised params as search_movies(query, 1): keystrokes and the final
+        # search share one cached (and in-flight coalesced) TMDb response
+        query = _normalize_query(query)
+        data = _get_json(
+            "/search/movie",
+            {"query": query, "language": "en-US", "page": 1},
+            ttl=120,
+            cache_key=_search_cache_key(query, 1),
+            timeout=5,
+        )
+        results = (data or {}).get("results", [])[:limit]
+        posters = TMDbService.format_poster_urls([movie.get("poster_path") for movie in results])
+        return [{
+            "id": movie.get("id"),
+            "title": movie.get("title"),
+            "year": (movie.get("release_date") or "")[:4],
+            "poster": poster
+        } for movie, poster in zip(results, posters)]
     
     @staticmethod
+    @_safe_tmdb_call("Error fetching genre list", default=list)
     def get_genre_list():
         """Get list of all movie genres from TMDb"""
-        try:
-            data = _get_json("/genre/movie/list", {"language": "en-US"}, ttl=86400)
-            return (data or {}).get("genres", [])
-        except Exception as e:
-            logger.warning(f"Error fetching genre list: {e}")
-            return []
+        data = _get_json("/genre/movie/list", {"language": "en-US"}, ttl=86400)
+        return (data or {}).get("genres", [])
 
     # ---------------- Keywords / Discovery -----------------
     @staticmethod
+    @_safe_tmdb_call("Error searching keywords", default=list)
     def search_keywords(query):
         """Search TMDb keywords by name. Returns list of {id, name}."""
-        try:
-            data = _get_json("/search/keyword", {"query": query}, ttl=86400)
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error searching keywords: {e}")
-            return []
+        data = _get_json("/search/keyword", {"query": query}, ttl=86400)
+        return (data or {}).get("results", [])
 
     @staticmethod
+    @_safe_tmdb_call("Error discovering by keywords", default=list)
     def discover_by_keywords(keyword_ids, page=1):
         """Discover movies by TMDb keyword ids (list or comma string)."""
-        try:
-            ids = keyword_ids
-            if isinstance(keyword_ids, (list, tuple)):
-                ids = ",".join(str(int(k)) for k in keyword_ids if k is not None)
-            data = _get_json(
-                "/discover/movie",
-                {
-                    "language": "en-US",
-                    "page": page,
-                    "sort_by": "popularity.desc",
-                    "with_keywords": ids,
-                    "include_adult": "false",
-                },
-                ttl=600,
-            )
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error discovering by keywords: {e}")
-            return []
+        ids = keyword_ids
+        if isinstance(keyword_ids, (list, tuple)):
+            # Ids come straight from TMDb keyword payloads (already ints); dropping
+            # duplicates in order also keeps equivalent lists on one cache entry
+            ids = ",".join(map(str, dict.fromkeys(k for k in keyword_ids if k is not None)))
+        data = _get_json(
+            "/discover/movie",
+            {
+                "language": "en-US",
+                "page": page,
+                "sort_by": "popularity.desc",
+                "with_keywords": ids,
+                "include_adult": "false",
+            },
+            ttl=600,
+        )
+        return (data or {}).get("results", [])
 
     # ---------------- People / Cast -----------------
     @staticmethod
+    @_safe_tmdb_call("Error searching people", default=list)
     def search_people(query, page=1):
         """Search for people (actors, directors) by name."""
-        try:
-            data = _get_json(
-                "/search/person",
-                {"query": query, "language": "en-US", "page": page},
-                ttl=600,
-            )
-            return (data or {}).get("results", [])
-        except Exception as e:
-            logger.warning(f"Error searching people: {e}")
-            return []
+        data = _get_json(
+            "/search/person",
+            {"query": query, "language": "en-US", "page": page},
+            ttl=600,
+        )
+        return (data or {}).get("results", [])
 
     @staticmethod
+    @_safe_tmdb_call("Error fetching person details")
     def get_person_details(person_id):
         """Get details (name, biography, profile) for a person."""
-        try:
-            return _get_json(f"/person/{person_id}", {"language": "en-US"}, ttl=7200)
-        except Exception as e:
-            logger.warning(f"Error fetching person details: {e}")
-            return None
+        return _get_json(f"/person/{person_id}", {"language": "en-US"}, ttl=7200)
 
     @staticmethod
+    @_safe_tmdb_call("Error fetching person credits")
     def get_person_movie_credits(person_id):
         """Get combined movie credits for a person (cast + crew)."""
-        try:
-            return _get_json(f"/person/{person_id}/movie_credits", {"language": "en-US"}, ttl=7200)
-        except Exception as e:
-            logger.warning(f"Error fetching person credits: {e}")
-            return None
+        return _get_json(f"/person/{person_id}/movie_credits", {"language": "en-US"}, ttl=7200)
@@ -3,13 +3,131 @@ User preference learning system for personalized movie recommendations.
 Combines content-based filtering with user behavior analysis.
 """
 
+import atexit
+import copy
+import hashlib
 import json
 from json.decoder import JSONDecodeError
 import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from collections import defaultdict
-import numpy as np
+from collections import defaultdict, deque, OrderedDict
+from heapq import nlargest
+from operator import itemgetter
 from ai_recommender import recommendation_engine
+from tmdb_service import TMDbService
+try:
+    import orjson
+except ImportError:  # Optional: faster profile (de)serialization; falls back to the stdlib json module
+    orjson = None
+try:
+    import zstandard
+except ImportError:  # Optional: zstd-compressed files for heavy profiles; plain JSON is written otherwise
+    zstandard = None
+
+# Number of parsed profiles kept in memory; active users skip the JSON re-read
+PROFILE_CACHE_SIZE = 256
+# Low-value events (views, searches, trailer clicks, feedback) are written back
+# at most once per this many seconds instead of on every call
+PROFILE_FLUSH_DELAY = 2.0
+# Rolling history lengths; kept in memory as bounded deques
+HISTORY_LIMITS = {"viewed": 100, "clicked_trailers": 50, "searches": 50}
+# Movie id collections held as sets in memory for O(1) membership tests
+MEMBERSHIP_SETS = ("liked", "disliked")
+# Container keys older profiles may lack; merged under loaded data in one step.
+# Each value is rebuilt into a fresh deque/dict/set on load, so sharing is safe.
+_CONTAINER_DEFAULTS = {key: () for key in (*HISTORY_LIMITS, "watchlist", *MEMBERSHIP_SETS)}
+# Rolling-history events are appended to a per-user sidecar log instead of
+# rewriting the profile; the log is folded back in at this many entries
+EVENT_LOG_COMPACT_AT = 256
+# Per-user edit locks are striped over this many RLocks (bounded, no per-user growth)
+PROFILE_LOCK_STRIPES = 64
+# Personalized re-rank results are reused for this long unless the profile changes
+RECS_CACHE_TTL = 300
+RECS_CACHE_SIZE = 1024
+# "files" (one JSON file per user) or "sqlite" (one WAL-mode database in data_dir)
+PROFILE_STORE = os.getenv("USER_PROFILE_STORE", "files").lower()
+# Profiles at least this large are stored zstd-compressed (when zstandard is installed);
+# smaller ones stay plain JSON. Readers sniff the frame magic, so both always load.
+PROFILE_COMPRESS_MIN_BYTES = 4096
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Saves for different users run concurrently under their own user locks, and a
+# ZstdCompressor must not be shared across threads: keep one per thread
+_zstd_local = threading.local()
+
+
+def _zstd_compressor():
+    compressor = getattr(_zstd_local, "compressor", None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=3)
+    return compressor
+
+
+def _dumps_profile(profile):
+    """Compact JSON bytes for a profile (no indentation: files are read by code, not people)."""
+    raw = _dumps_json(_json_ready(profile))
+    if zstandard is not None and len(raw) >= PROFILE_COMPRESS_MIN_BYTES:
+        return _zstd_compressor().compress(raw)
+    return raw
+
+
+def _dumps_json(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _json_ready(profile):
+    """Shallow copy with the in-memory deques/sets turned back into JSON arrays."""
+    data = dict(profile)
+    for key in HISTORY_LIMITS:
+        data[key] = list(profile[key])
+    # The watchlist is an insertion-ordered dict of ids; liked/disliked are sets,
+    # written sorted so saves don't reshuffle the file
+    data["watchlist"] = list(profile["watchlist"])
+    for key in MEMBERSHIP_SETS:
+        data[key] = sorted(profile[key], key=str)
+    return data
+
+
+def _epoch(value):
+    """Epoch seconds for an ISO timestamp written by older versions of the engine."""
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value).timestamp())
+        except ValueError:
+            return 0
+    return value
+
+
+def _upgrade_timestamps(data):
+    # Profiles used to store ISO strings; anything saved since uses epoch ints
+    data["created_at"] = _epoch(data["created_at"])
+    for entry in data.get("ratings", {}).values():
+        entry["timestamp"] = _epoch(entry.get("timestamp"))
+    for key in HISTORY_LIMITS:
+        for entry in data.get(key) or ():
+            entry["timestamp"] = _epoch(entry.get("timestamp"))
+
+
+class ProfileDecodeError(Exception):
+    """A stored profile exists but cannot be decoded in this environment."""
+
+
+def _loads_profile(raw):
+    if raw[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ProfileDecodeError("profile is zstd-compressed but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    return _loads_json(raw)
+
+
+def _loads_json(raw):
+    # orjson.JSONDecodeError subclasses json's, so callers catch one type either way
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
 
 
 class UserPreferenceEngine:
@@ -18,50 +136,279 @@ class UserPreferenceEngine:
     Uses collaborative filtering concepts combined with content-based filtering.
     """
     
-    def __init__(self, data_dir="user_data"):
+    def __init__(self, data_dir="user_data", cache_size=PROFILE_CACHE_SIZE, store=PROFILE_STORE):
         self.data_dir = data_dir
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
+        self._db = self._open_db() if store == "sqlite" else None
+        self._db_lock = threading.Lock()
+        # user_id -> (stored version or None, profile); LRU order, oldest first.
+        # The version is the file's mtime_ns, or the row's version in SQLite.
+        # _cache_lock guards these in-memory structures and is never held across
+        # file/database I/O; edits, encoding and writes of one user's profile run
+        # under that user's lock (see _user_lock)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.RLock()
+        self._user_locks = [threading.RLock() for _ in range(PROFILE_LOCK_STRIPES)]
+        # user_id -> profile with unsaved changes, flushed by a timer. Holding the
+        # profile here (not just the id) keeps edits safe if it leaves the LRU
+        self.flush_delay = PROFILE_FLUSH_DELAY
+        self._dirty = {}
+        self._flush_timer = None
+        # Users whose stored profile exists but could not be read: they get a
+        # throwaway empty profile that is never cached or written over the original
+        self._unreadable = set()
+        # user_id -> entries in the user's event log since the last full write
+        self._log_counts = {}
+        # (user_id, base_movie_id, num_recommendations, profile _version) -> (expires_at, recs)
+        self._recs_cache = OrderedDict()
+        atexit.register(self.flush)
     
+    def _user_lock(self, user_id):
+        return self._user_locks[hash(user_id) % len(self._user_locks)]
+
     def get_user_profile_path(self, user_id):
-        """Get file path for user profile"""
-        return os.path.join(self.data_dir, f"user_{user_id}.json")
+        """Get file path for user profile, sharded by a 2-hex-digit hash prefix
+        so no single directory grows past a few hundred entries per 100k users."""
+        shard = hashlib.blake2b(str(user_id).encode(), digest_size=4).hexdigest()[:2]
+        return os.path.join(self.data_dir, shard, f"user_{user_id}.json")
+
+    def get_event_log_path(self, user_id):
+        """Sidecar log of rolling-history events (one JSON object per line)"""
+        return self.get_user_profile_path(user_id)[:-len(".json")] + ".events.jsonl"
+
+    def _log_events(self, user_id, profile, key, entries):
+        """Persist entries already added to ``profile[key]`` by appending them to the log."""
+        if self._db is not None:
+            self._mark_dirty(user_id, profile)
+            return
+        log_path = self.get_event_log_path(user_id)
+        try:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, 'ab') as f:
+                f.write(b"".join(_dumps_json({"k": key, "e": entry}) + b"\n" for entry in entries))
+        except Exception as e:
+            print(f"Failed to append to event log {log_path}: {e}")
+            self._mark_dirty(user_id, profile)
+            return
+        with self._cache_lock:
+            count = self._log_counts.get(user_id, 0) + len(entries)
+            self._log_counts[user_id] = count
+        if count >= EVENT_LOG_COMPACT_AT:
+            # Compaction is just a full write; _write_profile drops the log
+            self._mark_dirty(user_id, profile)
+
+    def _replay_event_log(self, user_id, profile):
+        log_path = self.get_event_log_path(user_id)
+        count = 0
+        try:
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        event = _loads_json(line)
+                        profile[event["k"]].append(event["e"])
+                        count += 1
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn final line after a crash
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to replay event log {log_path}: {e}")
+        self._log_counts[user_id] = count
+        return profile
+
+    def _open_db(self):
+        # One shared connection; every statement runs under self._db_lock
+        db = sqlite3.connect(os.path.join(self.data_dir, "profiles.db"),
+                             check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "id TEXT PRIMARY KEY, profile BLOB NOT NULL, version INTEGER NOT NULL)"
+        )
+        return db
+
+    def _migrate_flat_profile(self, user_id, profile_path):
+        """Move a profile saved before sharding (data_dir/user_<id>.json) into its shard."""
+        legacy_path = os.path.join(self.data_dir, f"user_{user_id}.json")
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            os.replace(legacy_path, profile_path)
+        except Exception as e:
+            print(f"Failed to migrate user profile {legacy_path}: {e}")
     
+    @staticmethod
+    def _attach_containers(profile):
+        """Swap the JSON lists for the in-memory deques/sets the tracking methods use."""
+        for key, limit in HISTORY_LIMITS.items():
+            profile[key] = deque(profile[key], maxlen=limit)
+        profile["watchlist"] = dict.fromkeys(profile["watchlist"])
+        for key in MEMBERSHIP_SETS:
+            profile[key] = set(profile[key])
+        return profile
+
     def _empty_profile(self, user_id):
-        return {
+        return self._attach_containers({
             "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
+            "created_at": int(time.time()),
             "ratings": {},  # {movie_id: rating}
+            "_ratings_sum": 0.0,  # running totals behind get_user_stats' average
+            "_ratings_count": 0,
             "watchlist": [],  # [movie_id, ...]
             "viewed": [],  # [{movie_id, timestamp}, ...]
             "clicked_trailers": [],  # [{movie_id, timestamp}, ...]
             "searches": [],  # [{query, timestamp}, ...]
+            "liked": [],  # [movie_id, ...]
+            "disliked": [],  # [movie_id, ...]
             "preferences": {
                 "genres": {},  # {genre: score}
                 "directors": {},  # {director: score}
                 "actors": {},  # {actor: score}
                 "keywords": {}  # {keyword: score}
             }
-        }
+        })
+
+    @staticmethod
+    def _profile_mtime(profile_path):
+        try:
+            return os.stat(profile_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _stored_version(self, user_id):
+        """Version of the persisted profile (None if there is none), for cache checks."""
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute("SELECT version FROM users WHERE id = ?", (str(user_id),)).fetchone()
+            return row[0] if row else None
+        return self._profile_mtime(self.get_user_profile_path(user_id))
+
+    def _cache_store(self, user_id, mtime, profile):
+        with self._cache_lock:
+            self._cache[user_id] = (mtime, profile)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                # A dirty profile stays in self._dirty until flushed, so dropping
+                # it here loses nothing
+                self._cache.popitem(last=False)
+
+    def _mark_dirty(self, user_id, profile):
+        """Schedule a write-back of ``profile`` instead of saving now."""
+        with self._cache_lock:
+            self._dirty[user_id] = profile
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write every profile with pending changes to disk.
+
+        The pending profiles are snapshotted under _cache_lock; the writes happen
+        after releasing it, each under its own user's lock, so a flush never
+        stalls other users' loads. A profile stays pending until its write is
+        done, so a load in the meantime still finds the unsaved copy.
+        """
+        with self._cache_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending = list(self._dirty.items())
+        for user_id, profile in pending:
+            with self._user_lock(user_id):
+                version = self._write_profile(user_id, profile, durable=False)
+                with self._cache_lock:
+                    if self._dirty.get(user_id) is profile:
+                        del self._dirty[user_id]
+                    entry = self._cache.get(user_id)
+                    if version is not None and entry is not None and entry[1] is profile:
+                        self._cache[user_id] = (version, profile)
 
     def load_user_profile(self, user_id):
-        """Load user profile from disk or create a fresh one if corrupted or missing.
+        """Load user profile from memory, disk, or create a fresh one if corrupted or missing.
 
+        Parsed profiles are cached per user and reused while the stored version
+        (file mtime or SQLite row version) is unchanged, so the returned dict is
+        shared and edited in place under the user's lock: mutate it only through
+        the tracking methods, and read it through get_profile_snapshot().
         Recovers gracefully from JSONDecodeError by backing up the bad file and
         returning a new, empty profile structure.
         """
-        profile_path = self.get_user_profile_path(user_id)
-        
+        version = self._stored_version(user_id)
+        with self._cache_lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._cache.move_to_end(user_id)
+                return entry[1]
+            pending = self._dirty.get(user_id)
+            if pending is not None:
+                # Evicted before its write-back: the unsaved copy is the newest
+                self._cache_store(user_id, version, pending)
+                return pending
+
+        profile = self._read_user_profile(user_id)
+        if user_id in self._unreadable:
+            return profile
+        version = self._stored_version(user_id)
+        with self._cache_lock:
+            # A concurrent load may have cached (and an editor started mutating)
+            # its copy meanwhile; keep that one so no edit lands on an orphan
+            entry = self._cache.get(user_id)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            self._cache_store(user_id, version, profile)
+        return profile
+
+    def get_profile_snapshot(self, user_id):
+        """Private copy of the user's profile, safe to iterate without any lock.
+
+        Taken under the user's lock, so it never sees a half-applied edit from
+        the feedback writer or a concurrent request.
+        """
+        with self._user_lock(user_id):
+            return copy.deepcopy(self.load_user_profile(user_id))
+
+    def _prepare_loaded(self, data):
+        """Upgrade a decoded profile from older formats and attach in-memory containers."""
+        # Missing container keys (e.g. liked/disliked in older profiles) start empty
+        data = {**_CONTAINER_DEFAULTS, **data}
+        if isinstance(data.get("created_at"), str):
+            _upgrade_timestamps(data)
+        if '_ratings_count' not in data:
+            values = [r["rating"] for r in data.get("ratings", {}).values()]
+            data['_ratings_sum'] = float(sum(values))
+            data['_ratings_count'] = len(values)
+        return self._attach_containers(data)
+
+    def _read_user_profile(self, user_id):
+        self._unreadable.discard(user_id)
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute("SELECT profile FROM users WHERE id = ?", (str(user_id),)).fetchone()
+            if row is not None:
+                try:
+                    return self._prepare_loaded(_loads_profile(row[0]))
+                except Exception as e:
+                    print(f"Failed to load user profile {user_id} from SQLite: {e}; "
+                          "leaving the stored row untouched")
+                    self._unreadable.add(user_id)
+                    return self._empty_profile(user_id)
+            # Not in the database yet: fall back to a JSON file from the file
+            # store; the next save moves it into SQLite
+        profile = self._read_profile_file(user_id, self.get_user_profile_path(user_id))
+        return self._replay_event_log(user_id, profile)
+
+    def _read_profile_file(self, user_id, profile_path):
+        if not os.path.exists(profile_path):
+            self._migrate_flat_profile(user_id, profile_path)
         if os.path.exists(profile_path):
             try:
-                with open(profile_path, 'r') as f:
-                    data = json.load(f)
-                    # Ensure new keys exist for backward compatibility
-                    if 'disliked' not in data:
-                        data['disliked'] = []
-                    if 'liked' not in data:
-                        data['liked'] = []
-                    return data
+                with open(profile_path, 'rb') as f:
+                    return self._prepare_loaded(_loads_profile(f.read()))
             except JSONDecodeError:
                 # Backup the corrupt file and start fresh
                 try:
@@ -74,22 +421,64 @@ class UserPreferenceEngine:
                     print(f"Failed to back up corrupt profile {profile_path}: {e}")
                 return self._empty_profile(user_id)
             except Exception as e:
-                print(f"Failed to load user profile {profile_path}: {e}")
+                # Unreadable here (e.g. zstd without zstandard, I/O error) but not
+                # known to be corrupt: keep the file and never save over it
+                print(f"Failed to load user profile {profile_path}: {e}; leaving the file untouched")
+                self._unreadable.add(user_id)
                 return self._empty_profile(user_id)
         
         # Create new profile
         return self._empty_profile(user_id)
     
-    def save_user_profile(self, user_id, profile):
-        """Save user profile to disk atomically to avoid partial writes."""
+    def save_user_profile(self, user_id, profile, durable=True):
+        """Save user profile to disk atomically to avoid partial writes.
+
+        Runs under the user's lock only, so one user's fsync never blocks
+        other users' loads.
+        """
+        with self._user_lock(user_id):
+            with self._cache_lock:
+                self._dirty.pop(user_id, None)
+            version = self._write_profile(user_id, profile, durable=durable)
+            if version is not None:
+                self._cache_store(user_id, version, profile)
+
+    def _write_profile(self, user_id, profile, durable=True):
+        """Write ``profile`` via a temp file and rename; returns the new mtime or None.
+
+        ``durable`` fsyncs before the rename; write-back flushes skip it since a
+        crash only costs the last few seconds of browsing events. With the SQLite
+        store the profile is upserted instead and the row version returned.
+        Profiles whose stored copy could not be read are never written.
+        """
+        if user_id in self._unreadable:
+            print(f"Not saving user profile {user_id}: its stored copy could not be read")
+            return None
+        if self._db is not None:
+            return self._write_profile_row(user_id, profile)
         profile_path = self.get_user_profile_path(user_id)
         tmp_path = profile_path + ".tmp"
         try:
-            with open(tmp_path, 'w') as f:
-                json.dump(profile, f, indent=2)
-                f.flush()
-                os.fsync(f.fileno())
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            # The encoded bytes go straight to the fd: no Python-level buffer copy
+            data = memoryview(_dumps_profile(profile))
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+                if durable:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
             os.replace(tmp_path, profile_path)
+            # The profile now holds every logged event; a crash before this
+            # removal only replays them twice, never loses them
+            if self._log_counts.pop(user_id, 0):
+                try:
+                    os.remove(self.get_event_log_path(user_id))
+                except FileNotFoundError:
+                    pass
+            return self._profile_mtime(profile_path)
         except Exception as e:
             print(f"Failed to save user profile {profile_path}: {e}")
             # Best-effort cleanup of temp file
@@ -98,123 +487,185 @@ class UserPreferenceEngine:
                     os.remove(tmp_path)
             except Exception:
                 pass
+            return None
     
+    def _write_profile_row(self, user_id, profile):
+        # WAL + synchronous=NORMAL: commits are atomic and a checkpoint fsyncs many
+        # users' writes together, so there is no per-save fsync to opt out of
+        version = time.time_ns()
+        try:
+            blob = _dumps_profile(profile)
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO users (id, profile, version) VALUES (?, ?, ?)",
+                    (str(user_id), blob, version),
+                )
+            return version
+        except sqlite3.Error as e:
+            print(f"Failed to save user profile {user_id} to SQLite: {e}")
+            return None
+
+    @contextmanager
+    def editing(self, user_id, save=False, durable=False):
+        """Load a profile once, apply several events to it, and persist once.
+
+        By default the write goes through the debounced write-back; ``save=True``
+        writes immediately (fsynced when ``durable``). Holds only this user's lock.
+        """
+        with self._user_lock(user_id):
+            profile = self.load_user_profile(user_id)
+            yield profile
+            # Any edit may change ratings/preferences/dislikes, so it retires
+            # cached recommendations (history-only events skip editing())
+            profile["_version"] = profile.get("_version", 0) + 1
+            if save:
+                self.save_user_profile(user_id, profile, durable=durable)
+            else:
+                self._mark_dirty(user_id, profile)
+
     def track_rating(self, user_id, movie_id, rating, movie_data=None):
         """
         Track user rating for a movie.
         Updates preference profile based on rated movie features.
         """
-        profile = self.load_user_profile(user_id)
-        profile["ratings"][str(movie_id)] = {
-            "rating": rating,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Update preferences based on rating
-        if movie_data and rating >= 4:  # Only learn from highly-rated movies
-            self._update_preferences(profile, movie_data, weight=rating/5.0)
-        
-        self.save_user_profile(user_id, profile)
+        with self.editing(user_id, save=True, durable=True) as profile:
+            self._record_rating(profile, movie_id, rating, movie_data)
         return profile
     
     def track_view(self, user_id, movie_id):
         """Track that user viewed a movie"""
-        profile = self.load_user_profile(user_id)
-        profile["viewed"].append({
-            "movie_id": movie_id,
-            "timestamp": datetime.now().isoformat()
-        })
-        # Keep only last 100 views
-        profile["viewed"] = profile["viewed"][-100:]
-        self.save_user_profile(user_id, profile)
+        self.track_views(user_id, [movie_id])
+
+    def track_views(self, user_id, movie_ids):
+        """Track a page of viewed movies with a single log append"""
+        with self._user_lock(user_id):
+            profile = self.load_user_profile(user_id)
+            entries = [self._record_view(profile, movie_id) for movie_id in movie_ids]
+            self._log_events(user_id, profile, "viewed", entries)
     
     def track_trailer_click(self, user_id, movie_id):
         """Track that user clicked on a trailer"""
-        profile = self.load_user_profile(user_id)
-        profile["clicked_trailers"].append({
-            "movie_id": movie_id,
-            "timestamp": datetime.now().isoformat()
-        })
-        profile["clicked_trailers"] = profile["clicked_trailers"][-50:]
-        self.save_user_profile(user_id, profile)
+        with self._user_lock(user_id):
+            profile = self.load_user_profile(user_id)
+            self._log_events(user_id, profile, "clicked_trailers", [self._record_trailer_click(profile, movie_id)])
 
     def track_not_interested(self, user_id, movie_id):
-        profile = self.load_user_profile(user_id)
-        if 'disliked' not in profile:
-            profile['disliked'] = []
-        if movie_id not in profile['disliked']:
-            profile['disliked'].append(movie_id)
-        self.save_user_profile(user_id, profile)
+        with self.editing(user_id) as profile:
+            profile['disliked'].add(movie_id)
 
     def track_more_like(self, user_id, movie_id, movie_data=None):
-        profile = self.load_user_profile(user_id)
-        if 'liked' not in profile:
-            profile['liked'] = []
-        if movie_id not in profile['liked']:
-            profile['liked'].append(movie_id)
-        # Modestly reinforce preferences based on this movie
-        if movie_data:
-            self._update_preferences(profile, movie_data, weight=0.5)
-        self.save_user_profile(user_id, profile)
+        with self.editing(user_id) as profile:
+            self._record_more_like(profile, movie_id, movie_data)
     
     def track_search(self, user_id, query):
         """Track user search query"""
-        profile = self.load_user_profile(user_id)
-        profile["searches"].append({
-            "query": query,
-            "timestamp": datetime.now().isoformat()
-        })
-        profile["searches"] = profile["searches"][-50:]
-        self.save_user_profile(user_id, profile)
+        with self._user_lock(user_id):
+            profile = self.load_user_profile(user_id)
+            self._log_events(user_id, profile, "searches", [self._record_search(profile, query)])
     
     def add_to_watchlist(self, user_id, movie_id):
         """Add movie to user's watchlist"""
-        profile = self.load_user_profile(user_id)
-        if movie_id not in profile["watchlist"]:
-            profile["watchlist"].append(movie_id)
-        self.save_user_profile(user_id, profile)
-        return profile["watchlist"]
+        with self.editing(user_id, save=True) as profile:
+            profile["watchlist"].setdefault(movie_id)
+            return list(profile["watchlist"])
     
     def remove_from_watchlist(self, user_id, movie_id):
         """Remove movie from user's watchlist"""
-        profile = self.load_user_profile(user_id)
-        if movie_id in profile["watchlist"]:
-            profile["watchlist"].remove(movie_id)
-        self.save_user_profile(user_id, profile)
-        return profile["watchlist"]
+        with self.editing(user_id, save=True) as profile:
+            profile["watchlist"].pop(movie_id, None)
+            return list(profile["watchlist"])
+
+    # Event helpers: mutate an already-loaded profile (see editing())
+
+    def _record_rating(self, profile, movie_id, rating, movie_data=None):
+        previous = profile["ratings"].get(str(movie_id))
+        if previous is None:
+            profile["_ratings_count"] += 1
+        else:
+            profile["_ratings_sum"] -= previous["rating"]
+        profile["_ratings_sum"] += rating
+        profile["ratings"][str(movie_id)] = {
+            "rating": rating,
+            "timestamp": int(time.time())
+        }
+        
+        # Update preferences based on rating
+        if movie_data and rating >= 4:  # Only learn from highly-rated movies
+            self._update_preferences(profile, self._normalize_movie_data(movie_data), weight=rating/5.0)
+
+    def _record_view(self, profile, movie_id):
+        entry = {
+            "movie_id": movie_id,
+            "timestamp": int(time.time())
+        }
+        profile["viewed"].append(entry)
+        return entry
+
+    def _record_trailer_click(self, profile, movie_id):
+        entry = {
+            "movie_id": movie_id,
+            "timestamp": int(time.time())
+        }
+        profile["clicked_trailers"].append(entry)
+        return entry
+
+    def _record_more_like(self, profile, movie_id, movie_data=None):
+        profile['liked'].add(movie_id)
+        # Modestly reinforce preferences based on this movie
+        if movie_data:
+            self._update_preferences(profile, self._normalize_movie_data(movie_data), weight=0.5)
+
+    def _record_search(self, profile, query):
+        entry = {
+            "query": query,
+            "timestamp": int(time.time())
+        }
+        profile["searches"].append(entry)
+        return entry
     
+    @staticmethod
+    def _normalize_movie_data(movie_data):
+        """Reduce TMDb-style movie data (names or {"name": ...} dicts) to the plain,
+        non-empty name lists _update_preferences learns from."""
+        def names(items):
+            return [item.get("name", "") if isinstance(item, dict) else item for item in items]
+        return {
+            "genres": [g for g in names(movie_data.get("genres", [])) if g],
+            "director": [d for d in movie_data.get("director", []) if d],
+            "cast": [a for a in names(movie_data.get("cast", [])[:5]) if a],  # Top 5 actors
+            "keywords": [k for k in names(movie_data.get("keywords", [])[:10]) if k],
+        }
+
     def _update_preferences(self, profile, movie_data, weight=1.0):
         """
-        Update user preference profile based on movie features.
-        Higher weight = stronger preference signal.
+        Update user preference profile based on normalized movie features
+        (see _normalize_movie_data).
+        Higher weight = stronger preference signal. Scores are kept unrounded;
+        get_user_stats rounds them for display.
         """
         prefs = profile["preferences"]
         
         # Update genre preferences
-        for genre in movie_data.get("genres", []):
-            if isinstance(genre, dict):
-                genre = genre.get("name", "")
-            if genre:
-                prefs["genres"][genre] = round(prefs["genres"].get(genre, 0) + weight, 2)
+        genres = prefs["genres"]
+        for genre in movie_data["genres"]:
+            genres[genre] = genres.get(genre, 0) + weight
         
         # Update director preferences
-        for director in movie_data.get("director", []):
-            if director:
-                prefs["directors"][director] = round(prefs["directors"].get(director, 0) + weight, 2)
+        directors = prefs["directors"]
+        for director in movie_data["director"]:
+            directors[director] = directors.get(director, 0) + weight
         
         # Update actor preferences
-        for actor in movie_data.get("cast", [])[:5]:  # Top 5 actors
-            if isinstance(actor, dict):
-                actor = actor.get("name", "")
-            if actor:
-                prefs["actors"][actor] = round(prefs["actors"].get(actor, 0) + weight * 0.5, 2)
+        actors = prefs["actors"]
+        actor_weight = weight * 0.5
+        for actor in movie_data["cast"]:
+            actors[actor] = actors.get(actor, 0) + actor_weight
         
         # Update keyword preferences
-        for keyword in movie_data.get("keywords", [])[:10]:
-            if isinstance(keyword, dict):
-                keyword = keyword.get("name", "")
-            if keyword:
-                prefs["keywords"][keyword] = round(prefs["keywords"].get(keyword, 0) + weight * 0.3, 2)
+        keywords = prefs["keywords"]
+        keyword_weight = weight * 0.3
+        for keyword in movie_data["keywords"]:
+            keywords[keyword] = keywords.get(keyword, 0) + keyword_weight
     
     def get_personalized_recommendations(self, user_id, base_movie_id=None, num_recommendations=12):
         """
@@ -225,7 +676,15 @@ class UserPreferenceEngine:
         2. Score each movie based on user preferences
         3. Re-rank with personalization boost
         """
-        profile = self.load_user_profile(user_id)
+        profile = self.get_profile_snapshot(user_id)
+        cache_key = (user_id, base_movie_id, num_recommendations, profile.get("_version", 0))
+        now = time.monotonic()
+        with self._cache_lock:
+            hit = self._recs_cache.get(cache_key)
+            if hit is not None and hit[0] > now:
+                self._recs_cache.move_to_end(cache_key)
+                # Deep copy like tmdb_cache: callers may annotate the rec dicts
+                return copy.deepcopy(hit[1])
         
         # Get base recommendations
         if base_movie_id:
@@ -241,14 +700,21 @@ class UserPreferenceEngine:
             return []
         
         # Score and re-rank based on user preferences
+        user_prefs = profile["preferences"]
+        rated = profile["ratings"]
+        disliked = profile['disliked']
         personalized_recs = []
         for rec in base_recs:
             movie_profile = rec.get("profile", {})
             base_score = rec.get("final_score", rec.get("similarity_score", 0))
             
+            # Skip already rated movies
+            if str(movie_profile.get("id")) in rated:
+                continue
+            
             # Calculate personalization boost
             personalization_score = self._calculate_personalization_score(
-                profile["preferences"],
+                user_prefs,
                 movie_profile
             )
             
@@ -256,14 +722,9 @@ class UserPreferenceEngine:
             final_score = base_score + personalization_score
 
             # Apply strong penalty for disliked movies
-            disliked = set(profile.get('disliked', []))
             if movie_profile.get('id') in disliked:
                 final_score -= 0.5  # push far down
             
-            # Skip already rated movies
-            if str(movie_profile.get("id")) in profile["ratings"]:
-                continue
-            
             personalized_recs.append({
                 **rec,
                 "personalization_score": round(personalization_score * 100, 1),
@@ -272,36 +733,43 @@ class UserPreferenceEngine:
         
         # Sort by final score
         personalized_recs.sort(key=lambda x: x["final_score"], reverse=True)
+        personalized_recs = personalized_recs[:num_recommendations]
         
-        return personalized_recs[:num_recommendations]
+        with self._cache_lock:
+            self._recs_cache[cache_key] = (now + RECS_CACHE_TTL, copy.deepcopy(personalized_recs))
+            self._recs_cache.move_to_end(cache_key)
+            while len(self._recs_cache) > RECS_CACHE_SIZE:
+                self._recs_cache.popitem(last=False)
+        return personalized_recs
     
     def _calculate_personalization_score(self, user_prefs, movie_profile):
         """
         Calculate how well a movie matches user preferences.
         Returns a score between 0.0 and 0.3 (adds up to 30% boost max).
         """
-        score = 0.0
+        # Plain loops over local dict.get beat sum(<genexpr>) ~3x for these
+        # handful-of-items lists: no generator frame per call
         
         # Genre matching (max +0.15)
-        genre_score = 0.0
-        for genre in movie_profile.get("genres", []):
-            if genre in user_prefs["genres"]:
-                genre_score += user_prefs["genres"][genre] * 0.03
-        score += min(genre_score, 0.15)
+        g_map = user_prefs["genres"]
+        g_sum = 0.0
+        for g in movie_profile.get("genres", ()):
+            g_sum += g_map.get(g, 0.0)
+        score = min(g_sum * 0.03, 0.15)
         
         # Director matching (max +0.10)
-        director_score = 0.0
-        for director in movie_profile.get("director", []):
-            if director in user_prefs["directors"]:
-                director_score += user_prefs["directors"][director] * 0.05
-        score += min(director_score, 0.10)
+        d_map = user_prefs["directors"]
+        d_sum = 0.0
+        for d in movie_profile.get("director", ()):
+            d_sum += d_map.get(d, 0.0)
+        score += min(d_sum * 0.05, 0.10)
         
         # Actor matching (max +0.05)
-        actor_score = 0.0
-        for actor in movie_profile.get("cast", [])[:5]:
-            if actor in user_prefs["actors"]:
-                actor_score += user_prefs["actors"][actor] * 0.01
-        score += min(actor_score, 0.05)
+        a_map = user_prefs["actors"]
+        a_sum = 0.0
+        for a in movie_profile.get("cast", [])[:5]:
+            a_sum += a_map.get(a, 0.0)
+        score += min(a_sum * 0.01, 0.05)
         
         return min(score, 0.30)  # Cap at 30% boost
     
@@ -310,12 +778,11 @@ class UserPreferenceEngine:
         Get recommendations based purely on user profile (no base movie).
         Looks at user's top genres/directors and finds popular movies.
         """
-        from tmdb_service import TMDbService
-        
-        # Get popular movies as candidates
+        # Get popular movies as candidates (cached for 10 minutes by TMDbService)
         candidates = TMDbService.get_popular_movies(page=1)
         
         # Build profiles for candidates
+        user_prefs = profile["preferences"]
         recommendations = []
         for movie in candidates[:num_recommendations * 2]:
             movie_id = movie.get("id")
@@ -331,7 +798,7 @@ class UserPreferenceEngine:
             
             # Calculate score based on preferences
             score = self._calculate_personalization_score(
-                profile["preferences"],
+                user_prefs,
                 movie_profile
             )
             
@@ -346,28 +813,28 @@ class UserPreferenceEngine:
         recommendations.sort(key=lambda x: x["final_score"], reverse=True)
         return recommendations[:num_recommendations]
     
-    def get_user_stats(self, user_id):
-        """Get statistics about user activity"""
-        profile = self.load_user_profile(user_id)
+    def get_user_stats(self, user_id, profile=None):
+        """Get statistics about user activity.
+
+        Pass a ``profile`` from get_profile_snapshot() to avoid copying it again.
+        """
+        if profile is None:
+            profile = self.get_profile_snapshot(user_id)
         
         return {
             "total_ratings": len(profile["ratings"]),
             "total_watchlist": len(profile["watchlist"]),
             "total_views": len(profile["viewed"]),
             "total_searches": len(profile["searches"]),
-            "top_genres": sorted(
-                profile["preferences"]["genres"].items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:5],
-            "top_directors": sorted(
-                profile["preferences"]["directors"].items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:3],
-            "average_rating": np.mean([
-                r["rating"] for r in profile["ratings"].values()
-            ]) if profile["ratings"] else 0
+            "top_genres": [(name, round(score, 2)) for name, score in nlargest(
+                5, profile["preferences"]["genres"].items(), key=itemgetter(1)
+            )],
+            "top_directors": [(name, round(score, 2)) for name, score in nlargest(
+                3, profile["preferences"]["directors"].items(), key=itemgetter(1)
+            )],
+            "average_rating": (
+                profile["_ratings_sum"] / profile["_ratings_count"]
+            ) if profile["_ratings_count"] else 0
         }
 
 